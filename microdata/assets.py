@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Checks of the images and links of the ``img`` and ``url`` itemprops.
+
+While compiling, the URLs of each post are recorded. Once the site is
+built, they are probed in a single batch: local files are checked with a
+pool of threads and the images are opened to check they are readable.
+Probes are cached by path, modification time and size.
+"""
+
+from __future__ import unicode_literals
+
+import io
+import json
+from multiprocessing.pool import ThreadPool
+import os
+
+try:
+    from urllib.parse import unquote, urljoin, urlsplit
+except ImportError:  # Python 2
+    from urllib import unquote
+    from urlparse import urljoin, urlsplit
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from microdata.core import TAG_ATTRIBUTES, prop_element
+from microdata.index import RecordStore, source_path
+
+# Tags whose itemprop info is the URL of an asset
+ASSET_TAGS = ('img', 'a')
+
+DEFAULT_THREADS = 8
+
+
+def assets_folder(config):
+    return os.path.join(config.get('CACHE_FOLDER', 'cache'), 'microdata', 'assets')
+
+
+def probes_path(config):
+    return os.path.join(config.get('CACHE_FOLDER', 'cache'), 'microdata', 'probes.json')
+
+
+def document_assets(document):
+    """Return the ``img`` and ``url`` itemprops of ``document``."""
+    assets = []
+    stack = [(document, None)]
+    while stack:
+        node, line = stack.pop()
+        # Inline nodes have no line, the one of their block is used
+        line = getattr(node, 'line', None) or line
+        if node.__class__.__name__ == 'ItemProp':
+            tag, attributes, empty = prop_element(node.prop)
+            url = attributes.get(TAG_ATTRIBUTES[tag][0]) if tag in ASSET_TAGS else None
+            if url:
+                assets.append({'name': node.prop.name, 'tag': tag, 'url': url, 'line': line})
+            continue
+        stack.extend((child, line) for child in reversed(getattr(node, 'children', ())))
+    return assets
+
+
+class AssetCollector(object):
+    """Extraction consumer recording the assets of each document."""
+
+    def __init__(self, folder):
+        self.store = RecordStore(folder)
+
+    def __call__(self, document, items):
+        assets = document_assets(document)
+        if assets:
+            self.store.write(source_path(document), {'assets': assets})
+        else:
+            self.store.remove(source_path(document))
+
+
+def local_path(url, base_url, site_url, output_folder):
+    """Return the file of ``OUTPUT_FOLDER`` at ``url``, relative to
+    ``base_url``, ``None`` for URLs outside of the site."""
+    url = urljoin(base_url or site_url, url)
+    if not url.startswith(site_url):
+        return None
+    path = unquote(urlsplit(url[len(site_url):]).path)
+    if not path or path.endswith('/'):
+        path += 'index.html'
+    return os.path.join(output_folder, *path.split('/'))
+
+
+def readable_image(path):
+    """Return whether Pillow can identify the image at ``path``."""
+    try:
+        image = Image.open(path)
+    except (IOError, OSError, ValueError):
+        return False
+    close = getattr(image, 'close', None)
+    if close:
+        close()
+    return True
+
+
+class AssetProber(object):
+    """Probe files with a pool of threads, caching the results in ``path``."""
+
+    def __init__(self, path, threads=DEFAULT_THREADS):
+        self.path = path
+        self.threads = threads
+        try:
+            with io.open(path, 'r', encoding='utf8') as f:
+                self.cache = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.cache = {}
+
+    def probe(self, path, image=False):
+        """Return whether ``path`` exists and, for images, is ``readable``."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return {'exists': False}
+        key = [stat.st_mtime, stat.st_size]
+        cached = self.cache.get(path)
+        if cached and cached['key'] == key and (not image or 'readable' in cached):
+            return cached
+        result = {'key': key, 'exists': True}
+        if image and Image is not None:
+            result['readable'] = readable_image(path)
+        return result
+
+    def probe_all(self, paths):
+        """Probe the ``(path, image)`` pairs in one batch, return a mapping of
+        the paths to their results."""
+        paths = sorted(set(paths))
+        pool = ThreadPool(self.threads)
+        try:
+            probes = pool.map(lambda args: self.probe(*args), paths)
+        finally:
+            pool.close()
+        # Files which are no longer referenced are dropped from the cache
+        self.cache = {}
+        results = {}
+        for (path, image), result in zip(paths, probes):
+            if result['exists']:
+                self.cache[path] = result
+            results[path] = result
+        return results
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with io.open(self.path, 'w', encoding='utf8') as f:
+            f.write(json.dumps(self.cache, ensure_ascii=False))
+
+
+def check_assets(folder, prober, permalinks, site_url, output_folder):
+    """Probe the assets recorded in ``folder``.
+
+    ``permalinks`` maps the absolute paths of the sources to the permalinks
+    of their posts. Return the problems, as ``(source, line, message)``.
+    """
+    references = []
+    for record in RecordStore(folder).records():
+        base_url = permalinks.get(os.path.abspath(record['source']))
+        for asset in record['assets']:
+            path = local_path(asset['url'], base_url, site_url, output_folder)
+            if path is not None:
+                references.append((record['source'], asset, path))
+    results = prober.probe_all((path, asset['tag'] == 'img') for source, asset, path in references)
+    problems = []
+    for source, asset, path in references:
+        result = results[path]
+        if not result['exists']:
+            problems.append((source, asset['line'], 'Missing {0} of {1}: {2}'.format(
+                'image' if asset['tag'] == 'img' else 'link', asset['name'], asset['url'])))
+        elif asset['tag'] == 'img' and result.get('readable') is False:
+            problems.append((source, asset['line'], 'Unreadable image of {0}: {1}'.format(
+                asset['name'], asset['url'])))
+    problems.sort(key=lambda p: (p[0], p[1] or 0))
+    return problems
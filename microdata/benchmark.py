@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmarks of the microdata directives, role and writer hooks.
+
+Run ``python -m microdata.benchmark --save baseline.json`` to record a
+baseline, then ``python -m microdata.benchmark --compare baseline.json`` to
+check for regressions.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import argparse
+import gc
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+import docutils
+from docutils.core import publish_doctree, publish_from_doctree, publish_parts
+
+from microdata.rst import register
+from microdata.render import writer_name
+
+SETTINGS = {
+    'report_level': 5,
+    'halt_level': 5,
+    'output_encoding': 'unicode',
+}
+
+ROLES = (
+    ':itemprop:`Item {0} <name>`',
+    ':itemprop:`30 min <prepTime|PT30M|time>`',
+    ':itemprop:`<photo|pie-{0}.jpg|img>`',
+    ':itemprop:`link {0} <url|http://example.com/{0}>`',
+    ':itemprop:`<datePublished|2009-05-08|meta>`',
+    ':itemprop:`{0} cups <amount>`',
+)
+
+# name: (documents, scopes per document, nesting depth, props per scope, ratio of block props)
+SCENARIOS = {
+    'small': (20, 5, 1, 5, 0.2),
+    'large': (100, 10, 2, 10, 0.2),
+    'deep': (50, 2, 12, 4, 0.2),
+    'roles': (50, 10, 1, 40, 0.0),
+    'blocks': (50, 10, 1, 10, 0.8),
+}
+
+# Documents growing in width (products with an offer) and in nesting depth
+SCALING = {
+    'wide': (lambda size: generate_corpus(1, size // 2, 2, 2, 0.0)[0], (1250, 2500, 5000, 10000)),
+    'deep': (lambda size: generate_corpus(1, 1, size, 2, 0.0)[0], (25, 50, 100, 200)),
+}
+
+
+def generate_scope(rng, depth, props, blocks, indent=''):
+    """Return the lines of ``depth`` itemscopes, each one nested in the previous one."""
+    lines = []
+    for level in range(depth):
+        lines.append(indent + '.. itemscope:: Recipe')
+        if level:
+            lines.append(indent + '    :itemprop: part')
+        lines.append('')
+        inner = indent + '    '
+        inline = []
+        for i in range(props):
+            if rng.random() < blocks:
+                lines.extend([inner + '.. itempropblock:: instruction', inner + '    :tag: p', '',
+                              inner + '    Step %d of the recipe.' % i, ''])
+            else:
+                inline.append(rng.choice(ROLES).format(i))
+        if inline:
+            lines.extend([inner + ' '.join(inline), ''])
+        indent = inner
+    return lines
+
+
+def generate_corpus(documents, scopes, depth, props, blocks, seed=0):
+    """Return a list of synthetic rST documents using microdata markup."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(documents):
+        lines = []
+        for _ in range(scopes):
+            lines.extend(generate_scope(rng, depth, props, blocks))
+        corpus.append('\n'.join(lines) + '\n')
+    return corpus
+
+
+def measure(func, corpus):
+    gc.collect()
+    start = time.time()
+    results = [func(text) for text in corpus]
+    return time.time() - start, results
+
+
+def peak_memory(func, corpus):
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for text in corpus:
+            func(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def doctree_memory(text):
+    """Return the memory held by the doctree of ``text``, in bytes."""
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        doctree = publish_doctree(text, settings_overrides=SETTINGS)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del doctree
+    return size
+
+
+# Run in a fresh interpreter, after the Nikola modules loaded anyway
+STARTUP_SCRIPT = """
+import json, sys, time
+import nikola.plugin_categories
+start = time.time()
+import microdata.microdata
+imported = time.time()
+docutils = 'docutils.parsers.rst' in sys.modules
+from microdata.rst import register
+register()
+print(json.dumps({'import': imported - start, 'register': time.time() - imported, 'docutils': docutils}))
+"""
+
+
+def startup(repeat=3):
+    """Measure the plugin import and registration times, keeping the best of ``repeat`` runs."""
+    runs = [json.loads(subprocess.check_output([sys.executable, '-c', STARTUP_SCRIPT]).decode('utf8'))
+            for _ in range(repeat)]
+    return {
+        'import': min(r['import'] for r in runs),
+        'register': min(r['register'] for r in runs),
+        'docutils': runs[0]['docutils'],
+    }
+
+
+def publish(text):
+    return publish_parts(text, writer_name=writer_name(), settings_overrides=SETTINGS)['fragment']
+
+
+def scaling(kind, repeat=1):
+    """Return the publishing time of growing documents of the ``kind`` scaling series."""
+    generate, sizes = SCALING[kind]
+    results = []
+    for size in sizes:
+        text = generate(size)
+        elapsed = min(measure(publish, [text])[0] for _ in range(repeat))
+        results.append({'scopes': size, 'lines': text.count('\n'), 'time': elapsed})
+    return results
+
+
+def run_scenario(corpus):
+    writer = writer_name()
+    roles = sum(text.count(':itemprop:') for text in corpus)
+    parse, doctrees = measure(lambda text: publish_doctree(text, settings_overrides=SETTINGS), corpus)
+    write, _ = measure(lambda doctree: publish_from_doctree(
+        doctree, writer_name=writer, settings_overrides=SETTINGS), doctrees)
+    del doctrees
+    total, _ = measure(publish, corpus)
+    return {
+        'documents': len(corpus),
+        'roles': roles,
+        'parse': parse,
+        'write': write,
+        'total': total,
+        'documents_per_second': len(corpus) / total if total else None,
+        'roles_per_second': roles / total if total else None,
+        'peak_memory': peak_memory(publish, corpus),
+    }
+
+
+def run(scenarios, repeat=3):
+    """Run the ``scenarios``, keeping the best timing of ``repeat`` runs."""
+    register()
+    results = {}
+    for name in scenarios:
+        corpus = generate_corpus(*SCENARIOS[name])
+        runs = [run_scenario(corpus) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r['total'])
+        best['parse'] = min(r['parse'] for r in runs)
+        best['write'] = min(r['write'] for r in runs)
+        results[name] = best
+    return {
+        'python': platform.python_version(),
+        'docutils': docutils.__version__,
+        'scenarios': results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return the (scenario, phase, ratio) slower than ``baseline`` by more than ``tolerance``."""
+    regressions = []
+    for name, result in results['scenarios'].items():
+        reference = baseline['scenarios'].get(name)
+        if not reference:
+            continue
+        for phase in ('parse', 'write', 'total'):
+            if reference[phase] and result[phase] > reference[phase] * (1 + tolerance):
+                regressions.append((name, phase, result[phase] / reference[phase]))
+    return regressions
+
+
+def report(results):
+    print('{0:<10} {1:>6} {2:>7} {3:>9} {4:>9} {5:>9} {6:>10} {7:>12} {8:>10}'.format(
+        'scenario', 'docs', 'roles', 'parse', 'write', 'total', 'docs/s', 'roles/s', 'peak KiB'))
+    for name, r in sorted(results['scenarios'].items()):
+        peak = '%d' % (r['peak_memory'] // 1024) if r['peak_memory'] is not None else '-'
+        print('{0:<10} {1:>6} {2:>7} {3:>9.3f} {4:>9.3f} {5:>9.3f} {6:>10.1f} {7:>12.1f} {8:>10}'.format(
+            name, r['documents'], r['roles'], r['parse'], r['write'], r['total'],
+            r['documents_per_second'], r['roles_per_second'], peak))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the microdata plugin.')
+    parser.add_argument('scenarios', nargs='*', choices=[[]] + sorted(SCENARIOS), default=[],
+                        help='scenarios to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario, the best one is kept')
+    parser.add_argument('--memory', type=int, metavar='SCOPES',
+                        help='measure the doctree memory of a document with SCOPES itemscopes')
+    parser.add_argument('--startup', action='store_true',
+                        help='measure the plugin import and registration times')
+    parser.add_argument('--scaling', choices=sorted(SCALING),
+                        help='measure how the publishing time grows with the document width or depth')
+    parser.add_argument('--save', metavar='FILE', help='save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results with a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='accepted slowdown ratio when comparing (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        register()
+        text = generate_corpus(1, args.memory, 1, 10, 0.1)[0]
+        size = doctree_memory(text)
+        print('Doctree of {0} itemscopes and {1} itemprops: {2} KiB'.format(
+            args.memory, text.count(':itemprop:'), size // 1024 if size is not None else '-'))
+        return 0
+
+    if args.startup:
+        result = startup(args.repeat)
+        print('Plugin import: {0:.1f} ms{1}, registration: {2:.1f} ms'.format(
+            result['import'] * 1000, ' (imports docutils)' if result['docutils'] else '',
+            result['register'] * 1000))
+        return 0
+
+    if args.scaling:
+        register()
+        print('{0:>8} {1:>8} {2:>9} {3:>12}'.format('scopes', 'lines', 'time', 'us/line'))
+        for r in scaling(args.scaling, args.repeat):
+            print('{0:>8} {1:>8} {2:>9.3f} {3:>12.1f}'.format(
+                r['scopes'], r['lines'], r['time'], r['time'] * 1e6 / r['lines']))
+        return 0
+
+    results = run(args.scenarios or sorted(SCENARIOS), args.repeat)
+    report(results)
+    if args.save:
+        with io.open(args.save, 'w', encoding='utf8') as f:
+            f.write(json.dumps(results, indent=2, sort_keys=True))
+    if args.compare:
+        with io.open(args.compare, 'r', encoding='utf8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, phase, ratio in regressions:
+            print('Regression: {0} {1} is {2:.0%} of the baseline'.format(name, phase, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Top-level itemscope blocks of reST sources, rendered separately.
+
+A source is split into its skeleton, where each block is replaced by a
+placeholder comment, and its blocks. Rendering them apart and splicing the
+blocks into the skeleton gives the HTML of the whole source, so that a
+change to a block only renders that block again.
+"""
+
+from __future__ import unicode_literals
+
+import re
+
+from microdata.core import RE_OTHER_DIRECTIVE
+
+PLACEHOLDER = '.. microdata-block-%d\n'
+RE_PLACEHOLDER = re.compile(r'<!-- microdata-block-(\d+) -->\n')
+
+# Markup whose output depends on the rest of the document: references,
+# footnotes, citations, substitutions, inline and explicit targets
+RE_CONTEXTUAL = re.compile(r'`__?(?!\w)|\w__?(?![\w`])|\]_|(?<![^\s\'"(\[{<-])\|\S|_`|^\s*\.\. +[_\[|]', re.M)
+
+# Directives changing how the rest of the document is parsed or written
+RE_DOCUMENT_DIRECTIVE = re.compile(
+    r'^\.\. +(?:default-role|role|class|sectnum|section-numbering|contents|title|header|footer)::', re.M)
+
+
+def is_self_contained(block):
+    return not RE_OTHER_DIRECTIVE.search(block) and not RE_CONTEXTUAL.search(block)
+
+
+def split_blocks(source):
+    """Return the skeleton of ``source`` and its top-level itemscope blocks.
+
+    Blocks which are not self-contained stay in the skeleton, and nothing is
+    split when the document has directives affecting its whole content.
+    """
+    if RE_DOCUMENT_DIRECTIVE.search(source):
+        return source, []
+    lines = source.splitlines(True)
+    skeleton = []
+    blocks = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.startswith('.. itemscope::') or (i and lines[i - 1].strip()):
+            skeleton.append(line)
+            i += 1
+            continue
+        end = i + 1
+        while end < len(lines) and (not lines[end].strip() or lines[end][0] in ' \t'):
+            end += 1
+        # Trailing blank lines separate the block from what follows
+        while end > i + 1 and not lines[end - 1].strip():
+            end -= 1
+        block = ''.join(lines[i:end])
+        if is_self_contained(block):
+            skeleton.append(PLACEHOLDER % len(blocks))
+            blocks.append(block)
+        else:
+            skeleton.append(block)
+        i = end
+    return ''.join(skeleton), blocks
+
+
+def splice(skeleton, blocks):
+    """Replace the placeholders of the ``skeleton`` HTML with the ``blocks``
+    HTML, ``None`` if any placeholder is missing."""
+    parts = RE_PLACEHOLDER.split(skeleton)
+    indexes = [int(index) for index in parts[1::2]]
+    if indexes != list(range(len(blocks))):
+        return None
+    parts[1::2] = blocks
+    return ''.join(parts)
+
+
+def batch(blocks):
+    """Join ``blocks`` into a single source, see :func:`unbatch`."""
+    return ''.join('%s\n%s\n' % (block, PLACEHOLDER % index) for index, block in enumerate(blocks))
+
+
+def unbatch(html, count):
+    """Split the HTML of a :func:`batch` of ``count`` blocks, ``None`` if
+    the placeholders are not found."""
+    parts = RE_PLACEHOLDER.split(html)
+    if [int(index) for index in parts[1::2]] != list(range(count)) or parts[-1]:
+        return None
+    return parts[0:-1:2]
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import errno
+import functools
+import hashlib
+import io
+import json
+import marshal
+import mmap
+import os
+import struct
+import zlib
+
+# SharedCache consulted by the shared memoized functions, on local misses
+shared = None
+
+
+class LRUCache(object):
+    """A size-bounded mapping discarding the least recently used entries."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def memoized(maxsize=1024, share=False):
+    """Cache the results of ``func`` in a :class:`LRUCache`.
+
+    The cache is reachable through the ``cache`` attribute of the decorated
+    function. Exceptions are not cached. With ``share``, results missing
+    from the cache are looked up in the :data:`shared` cache of the build,
+    and stored there, so that worker processes do not all start cold;
+    ``share`` may be a function of the arguments returning the part of them
+    that keys the shared entry.
+    """
+    def decorator(func):
+        cache = LRUCache(maxsize)
+        missing = object()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            result = cache.get(args, missing)
+            if result is missing:
+                key = None
+                if share and shared is not None:
+                    shared_args = args if share is True else share(*args)
+                    key = repr((func.__name__, shared_args)).encode('utf8')
+                    result = shared.get(key, missing)
+                if result is missing:
+                    result = func(*args)
+                    if key is not None:
+                        shared.set(key, result)
+                cache.set(args, result)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+class SharedCache(object):
+    """A fixed-size cache in a memory-mapped file, shared by processes.
+
+    The file at ``path`` holds ``size // SLOT_SIZE`` slots. A key is stored in
+    one of the two slots following a stable hash of its bytes, evicting the
+    entry found there when both are taken. Slots are written without locks:
+    a checksum makes torn or concurrent writes read as misses. Entries larger
+    than a slot are not stored. Values are marshalled, so they must be plain
+    tuples, strings and numbers.
+    """
+
+    SLOT_SIZE = 512
+    # Payload length, payload checksum and key hash of a slot
+    HEADER = struct.Struct(str('<III'))
+
+    def __init__(self, path, size=4 * 1024 * 1024):
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        self.path = path
+        self.slots = max(1, size // self.SLOT_SIZE)
+        length = self.slots * self.SLOT_SIZE
+        with open(path, 'a+b') as f:
+            if os.path.getsize(path) < length:
+                f.truncate(length)
+            self.map = mmap.mmap(f.fileno(), length)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(1 for offset in range(0, self.slots * self.SLOT_SIZE, self.SLOT_SIZE)
+                   if self.HEADER.unpack_from(self.map, offset)[0])
+
+    def offsets(self, key):
+        """Return the hash of ``key`` and the offsets of its two slots."""
+        code = zlib.crc32(key) & 0xffffffff
+        slot = code % self.slots
+        return code, (slot * self.SLOT_SIZE, (slot + 1) % self.slots * self.SLOT_SIZE)
+
+    def get(self, key, default=None):
+        code, offsets = self.offsets(key)
+        for offset in offsets:
+            length, checksum, stored_code = self.HEADER.unpack_from(self.map, offset)
+            if stored_code != code or not 0 < length <= self.SLOT_SIZE - self.HEADER.size:
+                continue
+            start = offset + self.HEADER.size
+            payload = self.map[start:start + length]
+            if zlib.crc32(payload) & 0xffffffff == checksum:
+                stored_key, value = marshal.loads(payload)
+                if stored_key == key:
+                    self.hits += 1
+                    return value
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        payload = marshal.dumps((key, value), 2)
+        if len(payload) > self.SLOT_SIZE - self.HEADER.size:
+            return
+        code, offsets = self.offsets(key)
+        offset = offsets[0]
+        for candidate in offsets:
+            length, checksum, stored_code = self.HEADER.unpack_from(self.map, candidate)
+            if not length or stored_code == code:
+                offset = candidate
+                break
+        start = offset + self.HEADER.size
+        # The slot reads as empty while its payload is written
+        self.HEADER.pack_into(self.map, offset, 0, 0, 0)
+        self.map[start:start + len(payload)] = payload
+        self.HEADER.pack_into(self.map, offset, len(payload), zlib.crc32(payload) & 0xffffffff, code)
+
+    def close(self):
+        self.map.close()
+
+
+def make_folder(folder):
+    """Create ``folder``, which other processes may create too."""
+    try:
+        os.makedirs(folder)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def replace_file(tmp_path, path):
+    """Move ``tmp_path`` over ``path``, which other processes may write too."""
+    if hasattr(os, 'replace'):
+        os.replace(tmp_path, path)
+        return
+    # Python 2 can not rename over an existing file on Windows
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        os.rename(tmp_path, path)
+
+
+class DiskCache(object):
+    """A content-addressed store of JSON documents kept below ``folder``."""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    @staticmethod
+    def key(*parts):
+        digest = hashlib.sha1()
+        for part in parts:
+            digest.update(part.encode('utf8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, key[:2], key[2:] + '.json')
+
+    def get(self, key):
+        try:
+            with io.open(self.path(key), 'r', encoding='utf8') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, key, value):
+        path = self.path(key)
+        make_folder(os.path.dirname(path))
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with io.open(tmp_path, 'w', encoding='utf8') as f:
+            f.write(json.dumps(value, ensure_ascii=False))
+        replace_file(tmp_path, path)
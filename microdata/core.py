@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+from collections import namedtuple
+import re
+
+from microdata.cache import memoized
+from microdata.isodate import normalize
+from microdata.vocabulary import get_vocabulary
+
+ROLE_CACHE_SIZE = 1024
+TAG_CACHE_SIZE = 4096
+
+# A parsed itemprop role
+Prop = namedtuple('Prop', 'value name info tag')
+
+# tag -> (attribute holding the itemprop info, whether the element is empty)
+TAG_ATTRIBUTES = {
+    'a': ('href', False),
+    'img': ('src', True),
+    'time': ('datetime', False),
+    'meta': ('content', True),
+}
+
+# Tags whose value is converted into an ISO 8601 date or duration
+ISO_TAGS = frozenset(['time', 'meta'])
+
+# Default tag of the itemscope and itempropblock elements
+BLOCK_TAG = 'div'
+
+# Attribute values are escaped as the docutils HTML writers do
+SPECIAL_CHARACTERS = {
+    ord('&'): '&amp;',
+    ord('<'): '&lt;',
+    ord('"'): '&quot;',
+    ord('>'): '&gt;',
+    ord('@'): '&#64;',
+}
+RE_WHITESPACE = re.compile('[\n\r\t\v\f]')
+
+# A directive other than the plugin ones, whose output may depend on more
+# than the content (included files, substitutions...)
+RE_OTHER_DIRECTIVE = re.compile(r'^\s*\.\. +(?!itemscope::|itempropblock::)[\w:-]+::', re.M)
+
+
+def itemtype_url(itemtype):
+    """Return the URL of ``itemtype``, the same string for every call."""
+    return get_vocabulary().itemtype(itemtype)
+
+
+@memoized(ROLE_CACHE_SIZE)
+def parse_role(text):
+    """Parse the ``value <name|info|tag>`` itemprop role syntax.
+
+    Return a ``Prop(value, name, info, tag)`` tuple. The text is scanned once:
+    the name part lies between the first ``<`` and the last ``>``.
+    """
+    start = text.find('<')
+    end = text.rfind('>')
+    if start < 0 or end - start < 2:
+        raise ValueError('%s does not match expected itemprop format: :itemprop:`value <name>`' % text)
+    value = text[:start].strip()
+    name = text[start + 1:end]
+    info = ''
+    tag = ''
+    if ':' in name:
+        # depreciated, use | for nikola
+        name, info = name.split(':', 1)
+    elif '|' in name:
+        names = name.split('|', 2)
+        name = names[0]
+        if len(names) > 1:
+            info = names[1]
+        if len(names) > 2:
+            tag = names[2]
+    return Prop(value, name, info, tag)
+
+
+def prop_content(prop, tag):
+    """Return the machine-readable value of ``prop`` rendered as ``tag``.
+
+    Dates and durations of ``time`` and ``meta`` elements are converted into
+    ISO 8601, from the info or else from the displayed value.
+    """
+    if tag in ISO_TAGS:
+        return normalize(prop.info or prop.value) or prop.info
+    return prop.info
+
+
+def prop_element(prop):
+    """Return the tag, the attributes and the emptiness of the element
+    rendering ``prop``.
+
+    Without an explicit tag in the role, the vocabulary default tag of the
+    property is used, then ``span``. A default ``time`` or ``meta`` tag is
+    only used for values convertible into ISO 8601.
+    """
+    tag = prop.tag or get_vocabulary().tag(prop.name)
+    if not prop.tag and tag in ISO_TAGS and not normalize(prop.info or prop.value):
+        tag = None
+    tag = tag or 'span'
+    attribute, empty = TAG_ATTRIBUTES.get(tag, (None, False))
+    attributes = {'itemprop': prop.name}
+    if attribute:
+        content = prop_content(prop, tag)
+        if content:
+            attributes[attribute] = content
+    return tag, attributes, empty
+
+
+def scope_attributes(itemtype, itemprop=None, classes=None):
+    """Return the attributes of an itemscope element of ``itemtype``."""
+    attributes = {'itemscope': 'itemscope', 'itemtype': itemtype_url(itemtype)}
+    if itemprop:
+        attributes['itemprop'] = itemprop
+    if classes:
+        attributes['class'] = classes
+    return attributes
+
+
+def block_attributes(itemprop, classes=None):
+    """Return the attributes of an itempropblock element."""
+    attributes = {'itemprop': itemprop}
+    if classes:
+        attributes['class'] = classes
+    return attributes
+
+
+def is_compact(tag, compact=False):
+    """Whether the first paragraph of an itemscope is rendered unwrapped."""
+    return tag == 'p' or compact
+
+
+@memoized(TAG_CACHE_SIZE, share=True)
+def html_tags(tag, attributes, empty=False, minimize=False):
+    """Return the opening and closing HTML tags of an element.
+
+    ``attributes`` is a tuple of ``(name, value)`` pairs. The tags are those
+    of the docutils HTML writers: sorted and escaped attributes, and empty
+    elements closed by `` />`` without closing tag. With ``minimize``,
+    boolean attributes (whose value is their name) are written bare.
+    """
+    parts = [tag]
+    for name, value in sorted(attributes):
+        if minimize and name == value:
+            parts.append(name)
+            continue
+        parts.append('%s="%s"' % (name, RE_WHITESPACE.sub(' ', value).translate(SPECIAL_CHARACTERS)))
+    if empty:
+        return '<%s />' % ' '.join(parts), ''
+    return '<%s>' % ' '.join(parts), '</%s>' % tag
+
+
+@memoized(TAG_CACHE_SIZE, share=lambda prop, vocabulary: prop)
+def _prop_tags(prop, vocabulary):
+    tag, attributes, empty = prop_element(prop)
+    return html_tags(tag, tuple(attributes.items()), empty)
+
+
+def prop_tags(prop):
+    """Return the opening and closing HTML tags of ``prop``."""
+    # The vocabulary may provide the tag, it is part of the cache key
+    return _prop_tags(prop, get_vocabulary())
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import re
+
+from microdata.cache import make_folder, replace_file
+from microdata.vocabulary import fingerprint, get_vocabulary
+
+# Nikola rebuilds a post when the setting named after this prefix changes
+CONFIG_DEPENDENCY = '####MAGIC####CONFIG:'
+
+# Settings changing the output of every post using microdata
+CONFIG_KEYS = ('MICRODATA_JSONLD', 'MICRODATA_VALIDATE', 'MICRODATA_COMPACT_HTML')
+
+RE_UNSAFE = re.compile(r'[^\w.-]')
+
+# The DependencyTracker of the build, None when dependencies are not tracked
+tracker = None
+
+
+def dependencies_folder(config):
+    return os.path.join(config.get('CACHE_FOLDER', 'cache'), 'microdata', 'deps')
+
+
+def definition(kind, name, vocabulary):
+    """Return what the output of a ``kind`` (types or properties) named ``name`` depends on."""
+    if kind == 'types':
+        url = vocabulary.itemtype(name)
+        return {'name': name, 'url': url, 'properties': sorted(vocabulary.properties(name))}
+    return {'name': name, 'tag': vocabulary.tag(name)}
+
+
+class DependencyTracker(object):
+    """Record the itemtypes, properties and settings posts depend on.
+
+    Each itemtype and property used by a post has a small file below
+    ``folder``, holding its vocabulary definition. The files are recorded as
+    dependencies of the posts and only rewritten when the definition
+    changes, so that Nikola only rebuilds the posts using a changed type.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        # path -> content, for the files known to be current
+        self.current = {}
+
+    def path(self, kind, name):
+        return os.path.join(self.folder, kind, RE_UNSAFE.sub('_', name) + '.json')
+
+    def record(self, document, kind, name):
+        """Record that ``document`` uses the ``kind`` named ``name``."""
+        seen = getattr(document, 'microdata_dependencies', None)
+        if seen is None:
+            seen = document.microdata_dependencies = set()
+            for key in CONFIG_KEYS:
+                self.add(document, CONFIG_DEPENDENCY + key)
+        if (kind, name) in seen:
+            return
+        seen.add((kind, name))
+        self.add(document, self.update(kind, name))
+
+    def add(self, document, dependency):
+        dependencies = getattr(document.settings, 'record_dependencies', None)
+        if dependencies is not None and hasattr(dependencies, 'add'):
+            dependencies.add(dependency)
+
+    def update(self, kind, name):
+        """Write the file of ``name`` unless it is current, return its path."""
+        path = self.path(kind, name)
+        content = json.dumps(definition(kind, name, get_vocabulary()), sort_keys=True)
+        if self.current.get(path) == content:
+            return path
+        try:
+            with io.open(path, 'r', encoding='utf8') as f:
+                changed = f.read() != content
+        except (IOError, OSError):
+            changed = True
+        if changed:
+            make_folder(os.path.dirname(path))
+            tmp = '%s.%d.tmp' % (path, os.getpid())
+            with io.open(tmp, 'w', encoding='utf8') as f:
+                f.write(content)
+            replace_file(tmp, path)
+        self.current[path] = content
+        return path
+
+    def refresh(self):
+        """Update the recorded files after a vocabulary change.
+
+        It runs before Nikola checks the posts dependencies, and only loads
+        the vocabulary when its file changed since the previous build.
+        """
+        stamp = os.path.join(self.folder, 'vocabulary')
+        key = fingerprint()
+        try:
+            with io.open(stamp, 'r', encoding='utf8') as f:
+                if f.read() == key:
+                    return
+        except (IOError, OSError):
+            pass
+        for kind in ('types', 'properties'):
+            folder = os.path.join(self.folder, kind)
+            if not os.path.isdir(folder):
+                continue
+            for filename in sorted(os.listdir(folder)):
+                if filename.endswith('.json'):
+                    with io.open(os.path.join(folder, filename), 'r', encoding='utf8') as f:
+                        name = json.load(f)['name']
+                    self.update(kind, name)
+        make_folder(self.folder)
+        with io.open(stamp, 'w', encoding='utf8') as f:
+            f.write(key)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import json
+import re
+
+from docutils import nodes
+from docutils.transforms import Transform
+
+from microdata.core import prop_content, prop_element
+
+RE_ITEMTYPE = re.compile(r'^(?P<vocab>.*[/#])?(?P<name>[^/#]*)$')
+
+# Callables receiving ``(document, items)`` once a document has been parsed
+consumers = []
+
+
+class MicrodataTransform(Transform):
+    """Extract the microdata items of a document and feed the consumers."""
+
+    default_priority = 880
+
+    def apply(self):
+        items = extract_items(self.document)
+        for consumer in consumers:
+            consumer(self.document, items)
+
+
+def note_document(document):
+    """Schedule the extraction pass for ``document``, once per document."""
+    if not consumers or getattr(document, 'microdata_noted', False):
+        return
+    document.microdata_noted = True
+    document.note_pending(nodes.pending(MicrodataTransform))
+
+
+def extract_items(document):
+    """Walk the doctree and return the top-level microdata items.
+
+    Each item is a dict holding its ``type`` URL, its ``properties`` (a
+    mapping of property names to lists of values, nested items being
+    dicts themselves), its ``anchor`` and source ``line``.
+    """
+    items = []
+    stack = [(document, None)]
+    while stack:
+        node, scope = stack.pop()
+        kind = node.__class__.__name__
+        if kind == 'ItemScope':
+            item = {
+                'type': node['itemtype'],
+                'properties': OrderedDict(),
+                'anchor': node['ids'][0] if node['ids'] else None,
+                'line': node.line,
+            }
+            if scope is not None and node.get('itemprop'):
+                scope['properties'].setdefault(node['itemprop'], []).append(item)
+            else:
+                items.append(item)
+            scope = item
+        elif kind == 'ItemProp':
+            if scope is not None:
+                tag = prop_element(node.prop)[0]
+                value = prop_content(node.prop, tag) or node.astext()
+                scope['properties'].setdefault(node.prop.name, []).append(value)
+            continue
+        elif kind == 'ItemPropBlock':
+            if scope is not None:
+                value = ' '.join(node.astext().split())
+                scope['properties'].setdefault(node['itemprop'], []).append(value)
+        if isinstance(node, nodes.Element):
+            stack.extend((child, scope) for child in reversed(node.children))
+    return items
+
+
+def jsonld(item, vocab=None):
+    """Convert an extracted item into a JSON-LD object."""
+    match = RE_ITEMTYPE.match(item['type'])
+    data = OrderedDict()
+    if vocab is None:
+        vocab = match.group('vocab') or ''
+        data['@context'] = {'@vocab': vocab}
+    if vocab and match.group('vocab') == vocab:
+        data['@type'] = match.group('name')
+    else:
+        data['@type'] = item['type']
+    for name, values in item['properties'].items():
+        values = [jsonld(v, vocab) if isinstance(v, dict) else v for v in values]
+        data[name] = values[0] if len(values) == 1 else values
+    return data
+
+
+def inject_jsonld(document, items):
+    """Append the items as a ``<script type="application/ld+json">``."""
+    if not items:
+        return
+    data = [jsonld(item) for item in items]
+    if len(data) == 1:
+        data = data[0]
+    script = '<script type="application/ld+json">%s</script>' % json.dumps(data).replace('</', '<\\/')
+    document.append(nodes.raw('', script, format='html'))
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Feeds of the items of a type, as JSON Lines or CSV.
+
+Feeds are built from the records of a :class:`~microdata.index.RecordStore`.
+The lines of each post are kept in a part file which is only written again
+when the record of the post changes, and the feed is the concatenation of
+the parts: items are streamed one post at a time. Other files built that way
+derive from :class:`PartedFile`.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import os
+import shutil
+
+from microdata.cache import replace_file
+from microdata.extract import jsonld
+
+FORMATS = ('jsonl', 'csv')
+
+
+def feeds_folder(config):
+    return os.path.join(config.get('CACHE_FOLDER', 'cache'), 'microdata', 'feeds')
+
+
+def feed_items(items, itemtypes):
+    """Yield the items whose type URL is in ``itemtypes``, nested ones included."""
+    stack = list(reversed(items))
+    while stack:
+        item = stack.pop()
+        if item['type'] in itemtypes:
+            yield item
+        for values in reversed(list(item['properties'].values())):
+            stack.extend(v for v in reversed(values) if isinstance(v, dict))
+
+
+def text(value):
+    """Nested items are written as their JSON-LD object."""
+    if isinstance(value, dict):
+        return json.dumps(jsonld(value), ensure_ascii=False)
+    return value
+
+
+def item_url(item, url):
+    """Return the URL of an item of the post at ``url``."""
+    if url and item.get('anchor'):
+        return '{0}#{1}'.format(url, item['anchor'])
+    return url
+
+
+def csv_field(value):
+    if any(c in value for c in ',"\r\n'):
+        return '"%s"' % value.replace('"', '""')
+    return value
+
+
+def csv_line(fields):
+    return ','.join(csv_field(field) for field in fields) + '\r\n'
+
+
+def write_file(path, lines):
+    """Atomically write the ``lines`` iterable to ``path``."""
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with io.open(tmp_path, 'w', encoding='utf8', newline='') as f:
+        for line in lines:
+            f.write(line)
+    replace_file(tmp_path, path)
+
+
+class PartedFile(object):
+    """A file written to ``path`` from the records of a :class:`RecordStore`.
+
+    The :meth:`lines` of each record are kept in a part file below
+    ``folder``, which is only written again when the record changes, and
+    the file is rebuilt from the parts by :meth:`stream`.
+    """
+
+    def __init__(self, path, folder):
+        self.path = path
+        key = hashlib.sha1(os.path.abspath(path).encode('utf8')).hexdigest()
+        self.folder = os.path.join(folder, key)
+
+    def fingerprint(self, base_url=''):
+        """Identify the settings of the parts, which are all written again
+        when it changes."""
+        return repr((self.__class__.__name__, base_url))
+
+    def header(self):
+        return ''
+
+    def footer(self):
+        return ''
+
+    def lines(self, record, url=None):
+        """Yield the lines of a record, ``url`` being the permalink of its post."""
+        raise NotImplementedError
+
+    def is_current(self, part, record_path):
+        """Whether the part is newer than the record and its source."""
+        if not os.path.exists(part) or os.path.getmtime(part) < os.path.getmtime(record_path):
+            return False
+        with io.open(part, 'r', encoding='utf8') as f:
+            source = json.loads(f.readline())
+        return os.path.isfile(source) and os.path.getmtime(source) <= os.path.getmtime(record_path)
+
+    def update(self, store, urls=None, base_url=''):
+        """Write the parts of the changed records and, if any, the file.
+
+        ``urls`` maps the absolute paths of the sources to the permalinks of
+        their posts. Return the number of written and removed parts.
+        """
+        urls = urls or {}
+        stamp = os.path.join(self.folder, 'fingerprint')
+        fingerprint = self.fingerprint(base_url)
+        try:
+            with io.open(stamp, 'r', encoding='utf8') as f:
+                fresh = f.read() == fingerprint
+        except (IOError, OSError):
+            fresh = False
+        if not fresh:
+            if os.path.isdir(self.folder):
+                shutil.rmtree(self.folder)
+            write_file(stamp, [fingerprint])
+        written = removed = 0
+        names = set()
+        for record_path in store.paths():
+            name = os.path.basename(record_path)
+            part = os.path.join(self.folder, name)
+            if self.is_current(part, record_path):
+                names.add(name)
+                continue
+            record = store.load(record_path)
+            if store.is_stale(record_path, record):
+                os.remove(record_path)
+                continue
+            url = urls.get(os.path.abspath(record['source']))
+            write_file(part, [json.dumps(record['source']) + '\n'] + list(self.lines(record, url)))
+            names.add(name)
+            written += 1
+        for name in os.listdir(self.folder):
+            if name.endswith('.json') and name not in names:
+                os.remove(os.path.join(self.folder, name))
+                removed += 1
+        if written or removed or not os.path.exists(self.path):
+            write_file(self.path, self.stream(sorted(names)))
+        return written, removed
+
+    def part_lines(self, names):
+        """Yield the lines of the parts ``names``."""
+        for name in names:
+            with io.open(os.path.join(self.folder, name), 'r', encoding='utf8', newline='') as f:
+                f.readline()
+                for line in f:
+                    yield line
+
+    def stream(self, names):
+        """Yield the content of the file, from the parts ``names``."""
+        yield self.header()
+        for line in self.part_lines(names):
+            yield line
+        yield self.footer()
+
+
+class Feed(PartedFile):
+    """The feed of the ``itemtype`` URL items, written to ``path``.
+
+    The format is given by the extension of ``path``. CSV feeds have one
+    column per property, ``columns`` or else every property of the type in
+    ``vocabulary``, multiple values being joined with ``"; "``.
+    """
+
+    def __init__(self, path, itemtype, folder, columns=None, vocabulary=None):
+        super(Feed, self).__init__(path, folder)
+        self.itemtype = itemtype
+        self.format = os.path.splitext(path)[1][1:].lower()
+        if self.format not in FORMATS:
+            raise ValueError('Unknown feed format: {0}'.format(path))
+        if columns is None and vocabulary is not None:
+            columns = sorted(vocabulary.properties(vocabulary.name(itemtype)))
+        self.columns = list(columns or ())
+
+    def fingerprint(self, base_url=''):
+        return repr((self.format, self.itemtype, self.columns, base_url))
+
+    def header(self):
+        if self.format == 'csv':
+            return csv_line(['@id'] + self.columns)
+        return ''
+
+    def lines(self, record, url=None):
+        for item in feed_items(record['items'], (self.itemtype,)):
+            item_id = item_url(item, url)
+            if self.format == 'csv':
+                fields = [item_id or '']
+                for column in self.columns:
+                    fields.append('; '.join(text(v) for v in item['properties'].get(column, ())))
+                yield csv_line(fields)
+            else:
+                data = jsonld(item)
+                if item_id:
+                    data['@id'] = item_id
+                yield json.dumps(data, ensure_ascii=False) + '\n'
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+
+from microdata.cache import replace_file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    path TEXT PRIMARY KEY,
+    mtime REAL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    record TEXT,
+    parent INTEGER,
+    itemprop TEXT,
+    itemtype TEXT,
+    anchor TEXT,
+    line INTEGER
+);
+CREATE TABLE IF NOT EXISTS properties (
+    item INTEGER,
+    name TEXT,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS items_by_record ON items (record);
+CREATE INDEX IF NOT EXISTS items_by_type ON items (itemtype);
+CREATE INDEX IF NOT EXISTS properties_by_item ON properties (item);
+CREATE INDEX IF NOT EXISTS properties_by_value ON properties (name, value);
+"""
+
+
+def records_folder(config):
+    return os.path.join(config.get('CACHE_FOLDER', 'cache'), 'microdata', 'items')
+
+
+def index_path(config):
+    return config.get('MICRODATA_INDEX_PATH') or os.path.join(
+        config.get('CACHE_FOLDER', 'cache'), 'microdata', 'index.sqlite')
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_path(document):
+    """Return the path of the source of ``document``.
+
+    Nikola renders the text of its posts, their path is in the settings.
+    """
+    settings = getattr(document, 'settings', None)
+    return getattr(settings, '_nikola_source_path', None) or document.get('source')
+
+
+class RecordStore(object):
+    """Per-post records of the extracted items, one JSON file per source.
+
+    Instances are extraction consumers: calling one with a document and its
+    items (re)writes the record of the document source, along with the URLs
+    of the images of its ``img`` itemprops.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def path(self, source):
+        key = hashlib.sha1(os.path.abspath(source).encode('utf8')).hexdigest()
+        return os.path.join(self.folder, key + '.json')
+
+    def __call__(self, document, items):
+        from microdata.assets import document_assets
+        images = [asset['url'] for asset in document_assets(document) if asset['tag'] == 'img']
+        self.write(source_path(document), {'items': items, 'images': images})
+
+    def write(self, source, data):
+        """Write the record of ``source``, along with its digest."""
+        if not source or not os.path.isfile(source):
+            return
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        record = dict(data, source=source, digest=file_digest(source))
+        path = self.path(source)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with io.open(tmp_path, 'w', encoding='utf8') as f:
+            f.write(json.dumps(record, ensure_ascii=False))
+        replace_file(tmp_path, path)
+
+    def remove(self, source):
+        if source and os.path.exists(self.path(source)):
+            os.remove(self.path(source))
+
+    def paths(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return [os.path.join(self.folder, name) for name in sorted(os.listdir(self.folder))
+                if name.endswith('.json')]
+
+    def load(self, path):
+        with io.open(path, 'r', encoding='utf8') as f:
+            return json.load(f)
+
+    def is_stale(self, path, record):
+        """A record is stale once its source is gone or changed without the
+        record being written again, i.e. the source lost its microdata."""
+        source = record['source']
+        if not os.path.isfile(source):
+            return True
+        if os.path.getmtime(source) <= os.path.getmtime(path):
+            return False
+        return file_digest(source) != record['digest']
+
+    def records(self):
+        """Yield the up to date records, dropping the stale ones."""
+        for path in self.paths():
+            record = self.load(path)
+            if self.is_stale(path, record):
+                os.remove(path)
+            else:
+                yield record
+
+
+class MicrodataIndex(object):
+    """A SQLite index of the items of every record of a :class:`RecordStore`."""
+
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, store):
+        """Re-index the records which changed since the last update.
+
+        Return the number of re-indexed and removed records.
+        """
+        db = self.connection
+        known = dict((path, (mtime, source)) for path, mtime, source
+                     in db.execute('SELECT path, mtime, source FROM records'))
+        updated = removed = 0
+        with db:
+            for path in store.paths():
+                mtime = os.path.getmtime(path)
+                indexed = known.pop(path, None)
+                if indexed is not None and indexed[0] == mtime:
+                    # Unchanged record, still check that its source did not drop its microdata
+                    source = indexed[1]
+                    if os.path.isfile(source) and os.path.getmtime(source) <= mtime:
+                        continue
+                record = store.load(path)
+                self._remove(path)
+                if store.is_stale(path, record):
+                    os.remove(path)
+                    removed += 1
+                    continue
+                # Touch the record so that an unchanged source is not hashed again
+                os.utime(path, None)
+                self._insert(path, os.path.getmtime(path), record)
+                updated += 1
+            for path in known:
+                self._remove(path)
+                removed += 1
+        return updated, removed
+
+    def _remove(self, path):
+        db = self.connection
+        db.execute('DELETE FROM properties WHERE item IN (SELECT id FROM items WHERE record = ?)', (path,))
+        db.execute('DELETE FROM items WHERE record = ?', (path,))
+        db.execute('DELETE FROM records WHERE path = ?', (path,))
+
+    def _insert(self, path, mtime, record):
+        db = self.connection
+        db.execute('INSERT INTO records (path, mtime, source) VALUES (?, ?, ?)',
+                   (path, mtime, record['source']))
+        stack = [(item, None, None) for item in reversed(record['items'])]
+        while stack:
+            item, parent, itemprop = stack.pop()
+            cursor = db.execute(
+                'INSERT INTO items (record, parent, itemprop, itemtype, anchor, line) VALUES (?, ?, ?, ?, ?, ?)',
+                (path, parent, itemprop, item['type'], item.get('anchor'), item.get('line')))
+            item_id = cursor.lastrowid
+            for name, values in item['properties'].items():
+                for value in values:
+                    if isinstance(value, dict):
+                        stack.append((value, item_id, name))
+                    else:
+                        db.execute('INSERT INTO properties (item, name, value) VALUES (?, ?, ?)',
+                                   (item_id, name, value))
+
+    def items(self, itemtype=None, name=None, value=None):
+        """Yield the top-level items, optionally filtered by type or by a
+        property name and value (e.g. every recipe with a given ingredient).
+
+        Each item is a dict with its ``type``, ``source``, ``anchor``,
+        ``line`` and its scalar ``properties``.
+        """
+        query = ('SELECT items.id, items.itemtype, records.source, items.anchor, items.line '
+                 'FROM items JOIN records ON items.record = records.path WHERE items.parent IS NULL')
+        args = []
+        if itemtype is not None:
+            query += ' AND items.itemtype = ?'
+            args.append(itemtype)
+        if name is not None:
+            query += ' AND items.id IN (SELECT item FROM properties WHERE name = ?'
+            args.append(name)
+            if value is not None:
+                query += ' AND value = ?'
+                args.append(value)
+            query += ')'
+        query += ' ORDER BY records.source, items.id'
+        for item_id, itemtype, source, anchor, line in self.connection.execute(query, args).fetchall():
+            properties = {}
+            for prop, prop_value in self.connection.execute(
+                    'SELECT name, value FROM properties WHERE item = ? ORDER BY rowid', (item_id,)):
+                properties.setdefault(prop, []).append(prop_value)
+            yield {
+                'type': itemtype,
+                'source': source,
+                'anchor': anchor,
+                'line': line,
+                'properties': properties,
+            }
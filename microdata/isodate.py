@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import datetime
+import re
+
+from microdata.cache import memoized
+
+CACHE_SIZE = 1024
+
+RE_ISO_DURATION = re.compile(
+    r'^P(?=\d|T\d)(\d+Y)?(\d+M)?(\d+W)?(\d+D)?(T(?=\d)(\d+H)?(\d+M)?(\d+(\.\d+)?S)?)?$')
+RE_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$')
+
+RE_DURATION_PART = re.compile(r'(\d+(?:[.,]\d+)?)\s*([a-z]+)\.?(?:\s*,?\s*(?:and\s+)?|$)', re.IGNORECASE)
+DURATION_UNITS = {
+    'd': 'D', 'day': 'D', 'days': 'D',
+    'h': 'H', 'hr': 'H', 'hrs': 'H', 'hour': 'H', 'hours': 'H',
+    'm': 'M', 'min': 'M', 'mins': 'M', 'minute': 'M', 'minutes': 'M',
+    's': 'S', 'sec': 'S', 'secs': 'S', 'second': 'S', 'seconds': 'S',
+}
+
+RE_DATE_MDY = re.compile(
+    r'^(?P<month>[a-z]+)\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<year>\d{4})$', re.IGNORECASE)
+RE_DATE_DMY = re.compile(
+    r'^(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?P<month>[a-z]+)\.?,?\s+(?P<year>\d{4})$', re.IGNORECASE)
+MONTHS = dict(
+    [(name, i + 1) for i, name in enumerate((
+        'january', 'february', 'march', 'april', 'may', 'june', 'july',
+        'august', 'september', 'october', 'november', 'december'))] +
+    [(name, i + 1) for i, name in enumerate((
+        'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'))] +
+    [('sept', 9)]
+)
+
+
+@memoized(CACHE_SIZE)
+def to_iso_duration(text):
+    """Convert a duration such as ``1 hr 15 min`` into ISO 8601 (``PT1H15M``).
+
+    Return ``None`` when ``text`` is not a duration.
+    """
+    text = text.strip()
+    if RE_ISO_DURATION.match(text):
+        return text
+    amounts = {}
+    position = 0
+    for match in RE_DURATION_PART.finditer(text):
+        unit = DURATION_UNITS.get(match.group(2).lower())
+        if match.start() != position or not unit or unit in amounts:
+            return None
+        amounts[unit] = match.group(1).replace(',', '.')
+        position = match.end()
+    if not amounts or position != len(text):
+        return None
+    duration = 'P' + ('%sD' % amounts['D'] if 'D' in amounts else '')
+    time = ''.join('%s%s' % (amounts[unit], unit) for unit in 'HMS' if unit in amounts)
+    return duration + ('T' + time if time else '')
+
+
+@memoized(CACHE_SIZE)
+def to_iso_date(text):
+    """Convert a date such as ``May 8, 2009`` into ISO 8601 (``2009-05-08``).
+
+    Return ``None`` when ``text`` is not a date.
+    """
+    text = text.strip()
+    if RE_ISO_DATE.match(text):
+        return text
+    match = RE_DATE_MDY.match(text) or RE_DATE_DMY.match(text)
+    if not match:
+        return None
+    month = MONTHS.get(match.group('month').lower())
+    if not month:
+        return None
+    try:
+        return datetime.date(int(match.group('year')), month, int(match.group('day'))).isoformat()
+    except ValueError:
+        return None
+
+
+@memoized(CACHE_SIZE)
+def normalize(text):
+    """Convert a human readable date or duration into ISO 8601, if possible."""
+    return to_iso_duration(text) or to_iso_date(text)
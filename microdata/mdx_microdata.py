@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Microdata extension to Python Markdown.
+
+It provides the reStructuredText syntax of the plugin, rendered through the
+same core functions as the docutils directives and role::
+
+    .. itemscope:: Recipe
+        :tag: section
+
+        .. itempropblock:: name
+            :tag: h1
+
+            Grandma's Holiday Apple Pie
+
+        Preparation time: :itemprop:`30 min <prepTime|PT30M|time>`
+"""
+
+from __future__ import unicode_literals
+
+import os
+import re
+import sys
+
+try:
+    from markdown.blockprocessors import BlockProcessor
+    from markdown.extensions import Extension
+    from markdown.inlinepatterns import Pattern
+    from markdown.util import AtomicString
+except ImportError:
+    # No need to catch this, if you try to use this without Markdown,
+    # the markdown compiler will fail first
+    BlockProcessor = Pattern = object
+    AtomicString = None
+
+    class Extension(object):
+        pass
+
+try:
+    from xml.etree import ElementTree as etree
+except ImportError:
+    from markdown.util import etree
+
+try:
+    from nikola.plugin_categories import MarkdownExtension
+except ImportError:
+    # Nikola < 7, the bases of the extension must still differ
+    class MarkdownExtension(object):
+        pass
+
+try:
+    import microdata  # noqa: F401
+except ImportError:
+    # Site plugins are loaded from their file, the package is the folder of it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microdata import vocabulary
+from microdata.core import BLOCK_TAG, block_attributes, is_compact, parse_role, prop_element, scope_attributes
+
+ITEMPROP_RE = r':itemprop:`([^`]+)`'
+DIRECTIVE_RE = re.compile(r'^\.\. (itemscope|itempropblock):: *(\S+) *$')
+OPTION_RE = re.compile(r'^:(tag|itemprop|compact|class):(?: +(.*?))? *$')
+
+
+def set_attributes(element, attributes):
+    # Sorted as the docutils writers do
+    for name, value in sorted(attributes.items()):
+        element.set(name, value)
+
+
+def unwrap_paragraph(element):
+    """Move the content of the leading paragraph of ``element`` into it."""
+    if not len(element) or element[0].tag != 'p' or element[0].attrib or element.text:
+        return
+    paragraph = element[0]
+    element.remove(paragraph)
+    element.text = paragraph.text
+    for index, child in enumerate(paragraph):
+        element.insert(index, child)
+    tail = paragraph.tail or ''
+    if len(paragraph):
+        paragraph[-1].tail = (paragraph[-1].tail or '') + tail
+    else:
+        element.text = (element.text or '') + tail
+
+
+class ItemPropPattern(Pattern):
+    """The ``:itemprop:`value <name|info|tag>``` inline syntax."""
+
+    def handleMatch(self, m):
+        try:
+            prop = parse_role(m.group(2))
+        except ValueError:
+            # Left as is, returning None would stop Markdown 3 at this match
+            return AtomicString(':itemprop:`%s`' % m.group(2))
+        tag, attributes, empty = prop_element(prop)
+        element = etree.Element(tag)
+        set_attributes(element, attributes)
+        # Like docutils, the value follows empty elements
+        if empty:
+            element.tail = AtomicString(prop.value)
+        else:
+            element.text = AtomicString(prop.value)
+        return element
+
+
+class DirectiveProcessor(BlockProcessor):
+    """The ``itemscope`` and ``itempropblock`` directives.
+
+    As in reStructuredText, the options and the content of a directive are
+    indented below it, its content possibly spanning several blocks.
+    """
+
+    def test(self, parent, block):
+        return bool(DIRECTIVE_RE.match(block.split('\n', 1)[0]))
+
+    def run(self, parent, blocks):
+        lines = blocks.pop(0).split('\n')
+        directive, argument = DIRECTIVE_RE.match(lines[0]).groups()
+        options = {}
+        content = []
+        for line in lines[1:]:
+            line = self.dedent(line)
+            match = OPTION_RE.match(line) if not content else None
+            if match:
+                options[match.group(1)] = match.group(2) or ''
+            else:
+                content.append(line)
+        content = ['\n'.join(content)] if content else []
+        while blocks and (blocks[0].startswith(' ' * self.tab_length) or not blocks[0].strip()):
+            content.append('\n'.join(self.dedent(line) for line in blocks.pop(0).split('\n')))
+
+        tag = options.get('tag') or BLOCK_TAG
+        element = etree.SubElement(parent, tag)
+        if directive == 'itemscope':
+            set_attributes(element, scope_attributes(argument, options.get('itemprop'), options.get('class')))
+        else:
+            set_attributes(element, block_attributes(argument, options.get('class')))
+        self.parser.parseChunk(element, '\n\n'.join(content))
+        if directive == 'itemscope' and is_compact(tag, 'compact' in options):
+            unwrap_paragraph(element)
+
+    def dedent(self, line):
+        if line.startswith(' ' * self.tab_length):
+            return line[self.tab_length:]
+        return line.lstrip(' ')
+
+
+class MicrodataExtension(MarkdownExtension, Extension):
+    """Microdata ``itemscope``, ``itempropblock`` and ``itemprop`` for Markdown."""
+
+    def set_site(self, site):
+        self.site = site
+        cache_folder = os.path.join(site.config.get('CACHE_FOLDER', 'cache'), 'microdata')
+        vocabulary.configure(site.config.get('MICRODATA_VOCABULARY'), cache_folder,
+                             site.config.get('MICRODATA_VOCABULARY_URL'), site.config.get('MICRODATA_PREFIXES'))
+        return super(MicrodataExtension, self).set_site(site)
+
+    def extendMarkdown(self, md, md_globals=None):
+        itemprop = ItemPropPattern(ITEMPROP_RE, md)
+        directive = DirectiveProcessor(md.parser)
+        if hasattr(md.inlinePatterns, 'register'):
+            # Before the backtick code pattern
+            md.inlinePatterns.register(itemprop, 'itemprop', 195)
+            md.parser.blockprocessors.register(directive, 'microdata', 105)
+        else:  # Markdown 2
+            md.inlinePatterns.add('itemprop', itemprop, '<backtick')
+            md.parser.blockprocessors.add('microdata', directive, '_begin')
+        md.registerExtension(self)
+
+
+def makeExtension(configs=None, **kwargs):  # pragma: no cover
+    return MicrodataExtension()
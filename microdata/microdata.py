@@ -19,14 +19,34 @@
 
 from __future__ import unicode_literals
 
-import re
+import atexit
+import json
+import os
+import sys
 
-from docutils import nodes
-from docutils.parsers.rst import directives, Directive, roles
 from nikola.plugin_categories import RestExtension
-from nikola.plugins.compile.rest import add_node
+from nikola.utils import LOGGER
 
-RE_ROLE = re.compile(r'(?P<value>.+?)?\s*\<(?P<name>.+)\>')
+# Nikola 8.3 loads this file as the "microdata" module, hiding the package
+if getattr(sys.modules.get('microdata'), '__file__', None) == __file__:
+    del sys.modules['microdata']
+try:
+    import microdata  # noqa: F401
+except ImportError:
+    # Site plugins are loaded from their file, the package is the folder of it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microdata import __version__
+from microdata import cache as microdata_cache
+from microdata import dependencies, vocabulary
+from microdata.cache import DiskCache, SharedCache
+from microdata.profiling import Profiler
+
+# Settings using the records of the extracted items
+RECORD_SETTINGS = ('MICRODATA_INDEX', 'MICRODATA_FEEDS', 'MICRODATA_SITEMAP', 'MICRODATA_SEARCH')
+
+# Only documents using the plugin markup go through the render cache
+MICRODATA_MARKERS = (':itemprop:', '.. itemscope::', '.. itempropblock::')
 
 
 class Plugin(RestExtension):
@@ -35,154 +55,272 @@ class Plugin(RestExtension):
 
     def set_site(self, site):
         self.site = site
-        directives.register_directive('itemscope', ItemScopeDirective)
-        directives.register_directive('itempropblock', ItemPropDirective)
-        roles.register_canonical_role('itemprop', itemprop_role)
-
-        add_node(ItemProp, visit_ItemProp, depart_ItemProp)
-        add_node(ItemPropBlock, visit_ItemPropBlock, depart_ItemPropBlock)
-        add_node(ItemScope, visit_ItemScope, depart_ItemScope)
+        cache_folder = configure_vocabulary(site.config)
+
+        profiler = None
+        profile = site.config.get('MICRODATA_PROFILE', False)
+        if profile:
+            profiler = Profiler()
+            if profile is True:
+                profile = os.path.join(cache_folder, 'profile.json')
+            atexit.register(write_profile, profiler, profile, site.config.get('MICRODATA_PROFILE_TOP', 10))
+
+        microdata_cache.shared = shared_cache(site.config.get('MICRODATA_SHARED_CACHE', False), cache_folder)
+        if profiler is not None and microdata_cache.shared is not None:
+            profiler.caches['shared'] = microdata_cache.shared
+
+        tracker = None
+        if site.config.get('MICRODATA_DEPENDENCIES', False):
+            tracker = dependencies.DependencyTracker(dependencies.dependencies_folder(site.config))
+            tracker.refresh()
+
+        rest = rest_module(site)
+        rst2html = getattr(rest.rst2html, 'uncached', rest.rst2html)
+        if site.config.get('MICRODATA_RENDER_CACHE', False):
+            salt = microdata_config(site.config) + vocabulary.fingerprint()
+            rst2html = cached_rst2html(rst2html, DiskCache(os.path.join(cache_folder, 'render')), salt,
+                                       tracker.folder if tracker else None,
+                                       site.config.get('MICRODATA_RENDER_BLOCKS', False))
+        rest.rst2html = deferred_rst2html(rst2html, setup, site.config, profiler, tracker)
 
         return super(Plugin, self).set_site(site)
 
 
-class ItemProp(nodes.Inline, nodes.TextElement):
-    pass
-
-
-def itemprop_role(role, rawtext, text, lineno, inliner, options={}, content=[]):
-    match = RE_ROLE.match(text)
-    if not match or not match.group('name'):
-        raise ValueError('%s does not match expected itemprop format: :itemprop:`value <name>`')
-    value = ''
-    if match.group('value'):
-        value = match.group('value')
-    name = match.group('name')
-    info = ''
-    tag = 'span'
-    if ':' in name:
-        # depreciated, use | for nikola
-        name, info = name.split(':', 1)
-    elif '|' in name:
-        names = name.split('|', 2)
-        name = names[0]
-        if len(names) > 1:
-            info = names[1]
-        if len(names) > 2:
-            tag = names[2]
-    return [ItemProp(value, value, name=name, info=info, tag=tag)], []
-
-
-class ItemPropBlock(nodes.Element):
-    def __init__(self, tagname, itemprop, classes=None):
-        kwargs = {
-            'itemprop': itemprop,
-        }
-        if classes:
-            kwargs['class'] = classes
-        super(ItemPropBlock, self).__init__('', **kwargs)
-        self.tagname = tagname
-
-
-class ItemPropDirective(Directive):
-    required_arguments = 1
-    has_content = True
-    option_spec = {
-        'tag': directives.unchanged,
-        'class': directives.unchanged,
-    }
-
-    def run(self):
-        # Raise an error if the directive does not have contents.
-        self.assert_has_content()
-        itemprop = self.arguments[0]
-        tag = self.options.get('tag', 'div')
-        classes = self.options.get('class', None)
-        node = ItemPropBlock(tag, itemprop, classes)
-        self.add_name(node)
-        self.state.nested_parse(self.content, self.content_offset, node)
-        return [node]
-
-
-class ItemScope(nodes.Element):
-    def __init__(self, tagname, itemtype, itemprop=None, compact=False, classes=None):
-        kwargs = {
-            'itemscope': None,
-            'itemtype': "http://data-vocabulary.org/%s" % itemtype,
+def rest_module(site):
+    """Return the module of the reST compiler of ``site``, calling its ``rst2html``.
+
+    The plugin managers of Nikola load the compiler plugins as separate
+    modules, which are not ``nikola.plugins.compile.rest``.
+    """
+    manager = site.plugin_manager
+    get_plugin = getattr(manager, 'get_plugin_by_name', None) or manager.getPluginByName
+    plugin_info = get_plugin('rest', 'PageCompiler')
+    if plugin_info is not None and plugin_info.plugin_object is not None:
+        module = sys.modules.get(plugin_info.plugin_object.__class__.__module__)
+        if hasattr(module, 'rst2html'):
+            return module
+    from nikola.plugins.compile import rest
+    return rest
+
+
+def configure_vocabulary(config):
+    """Configure the vocabulary from the site ``config``, return the cache folder of the plugin."""
+    cache_folder = os.path.join(config.get('CACHE_FOLDER', 'cache'), 'microdata')
+    vocabulary.configure(config.get('MICRODATA_VOCABULARY'), cache_folder,
+                         config.get('MICRODATA_VOCABULARY_URL'), config.get('MICRODATA_PREFIXES'))
+    return cache_folder
+
+
+def setup(config, profiler=None, tracker=None):
+    """Register the plugin with docutils and set up the extraction consumers.
+
+    It imports the docutils parts of the plugin, so it is deferred until the
+    first reST document is compiled.
+    """
+    from microdata import extract, rst, validation
+    from microdata.assets import AssetCollector, assets_folder
+    from microdata.cache import LRUCache
+    from microdata.index import RecordStore, records_folder
+
+    rst.register(profiler)
+    rst.compact_output = bool(config.get('MICRODATA_COMPACT_HTML', False))
+    dependencies.tracker = tracker
+    size = config.get('MICRODATA_PARSE_CACHE', 0)
+    rst.parse_cache = LRUCache(size) if size else None
+    if profiler is not None and rst.parse_cache is not None:
+        profiler.caches['parse'] = rst.parse_cache
+
+    del extract.consumers[:]
+    if config.get('MICRODATA_JSONLD', False):
+        extract.consumers.append(extract.inject_jsonld)
+    if any(config.get(key) for key in RECORD_SETTINGS):
+        extract.consumers.append(RecordStore(records_folder(config)))
+    if config.get('MICRODATA_ASSETS', False):
+        extract.consumers.append(AssetCollector(assets_folder(config)))
+    validation.enabled = bool(config.get('MICRODATA_VALIDATE', False))
+    if validation.enabled:
+        extract.consumers.append(validation.Validator(validation.problems_folder(config)))
+
+
+def deferred_rst2html(rst2html, setup, *args):
+    """Wrap Nikola ``rst2html`` to call ``setup(*args)`` before its first use."""
+    state = {'ready': False}
+
+    def wrapper(*rst_args, **rst_kwargs):
+        if not state['ready']:
+            setup(*args)
+            state['ready'] = True
+        return rst2html(*rst_args, **rst_kwargs)
+    wrapper.uncached = getattr(rst2html, 'uncached', rst2html)
+    return wrapper
+
+
+def write_profile(profiler, path, top=10):
+    """Write the profile report of the build, logging the slowest posts."""
+    if profiler.stats:
+        table = profiler.write(path, top)
+        LOGGER.info('Microdata profile written to {0}\n{1}'.format(path, table))
+
+
+def shared_cache(size, cache_folder):
+    """Open the shared cache of the build, ``size`` bytes large or 4 MiB when ``True``.
+
+    Its file is named after the plugin, vocabulary and Python versions, the
+    files of other versions are removed.
+    """
+    if not size:
+        return None
+    if size is True:
+        size = 4 * 1024 * 1024
+    folder = os.path.join(cache_folder, 'shared')
+    name = DiskCache.key(__version__, vocabulary.fingerprint(), '%d.%d' % sys.version_info[:2]) + '.cache'
+    if os.path.isdir(folder):
+        for other in os.listdir(folder):
+            if other != name:
+                try:
+                    os.remove(os.path.join(folder, other))
+                except OSError:
+                    pass
+    return SharedCache(os.path.join(folder, name), size)
+
+
+def microdata_config(config):
+    """Serialize the ``MICRODATA_*`` settings which may affect the output."""
+    settings = dict((k, v) for k, v in config.items() if k.startswith('MICRODATA_'))
+    return json.dumps(settings, sort_keys=True, default=repr)
+
+
+def cached_rst2html(rst2html, cache, salt='', dependencies_folder=None, blocks=False):
+    """Wrap Nikola ``rst2html`` with a content-addressed render cache.
+
+    Entries are keyed by the source text, the plugin, Nikola and docutils
+    versions, ``salt``, the docutils settings overrides and the transforms.
+    Only documents using microdata markup are cached, and only when they
+    rendered without warnings nor external dependencies (such as included
+    files). The settings and the files below ``dependencies_folder`` recorded
+    by the plugin are kept with the entry.
+
+    Only the calls compiling a post, which pass ``settings_overrides``, are
+    served from the cache: the document tree Nikola 8 returns last is not
+    kept, so it is ``None`` in cached results, and the calls reading the
+    metadata of a post always render it.
+
+    With ``blocks``, the top-level itemscope blocks of a document are cached
+    apart from the rest of it (see :mod:`microdata.blocks`), so a change to
+    a block only renders that block again.
+    """
+    import docutils
+    import nikola
+    versions = '%s %s' % (nikola.__version__, docutils.__version__)
+
+    def recorded(dependency):
+        return dependency.startswith(dependencies.CONFIG_DEPENDENCY) or bool(
+            dependencies_folder and dependency.startswith(dependencies_folder))
+
+    def entry_of(result):
+        """Return the cache entry of a result, ``None`` if it is not cacheable."""
+        output, error_level = result[:2]
+        deps = result[2] if len(result) > 2 else None
+        recorded_deps = deps.list if deps else []
+        if error_level < 2 and all(recorded(dependency) for dependency in recorded_deps):
+            return {
+                'output': output,
+                'error_level': error_level,
+                'deps': recorded_deps,
+                'with_deps': len(result) > 2,
+                'with_document': len(result) > 3,
+            }
+        return None
+
+    def result_of(entry):
+        from docutils.utils import DependencyList
+        result = (entry['output'], entry['error_level'])
+        if entry['with_deps']:
+            result += (DependencyList(None, entry.get('deps', [])),)
+        if entry.get('with_document'):
+            result += (None,)
+        return result
+
+    def settings_of(args, kwargs):
+        """Return the arguments of a call but its source and logger, which
+        do not change the output."""
+        settings = []
+        for name, value in sorted(kwargs.items()):
+            if name == 'logger':
+                continue
+            if name == 'settings_overrides':
+                value = sorted((value or {}).items())
+            elif name == 'transforms':
+                value = [transform.__name__ for transform in value or ()]
+            settings.append((name, value))
+        return repr((args, settings))
+
+    def render(source, key, args, kwargs):
+        """Return the cached or rendered entry of a source, ``None`` if it is
+        not cacheable."""
+        entry = cache.get(key)
+        if entry is None:
+            entry = entry_of(rst2html(source, *args, **kwargs))
+            if entry is not None:
+                cache.set(key, entry)
+        return entry
+
+    def render_blocks(source, settings, args, kwargs):
+        """Render ``source`` from its skeleton and blocks, ``None`` if a part
+        is not cacheable."""
+        from microdata import extract
+        from microdata.blocks import batch, splice, split_blocks, unbatch
+        # Consumers need the items of the whole document
+        if extract.consumers:
+            return None
+        skeleton, texts = split_blocks(source)
+        if not texts:
+            return None
+        key = cache.key(__version__, versions, salt, settings, 'skeleton', skeleton)
+        skeleton = render(skeleton, key, args, kwargs)
+        if skeleton is None:
+            return None
+        keys = [cache.key(__version__, versions, salt, settings, 'block', text) for text in texts]
+        blocks = [cache.get(key) for key in keys]
+        missing = [index for index, entry in enumerate(blocks) if entry is None]
+        if missing:
+            entry = entry_of(rst2html(batch([texts[index] for index in missing]), *args, **kwargs))
+            outputs = entry and unbatch(entry['output'], len(missing))
+            if not outputs:
+                return None
+            for index, output in zip(missing, outputs):
+                blocks[index] = dict(entry, output=output)
+                cache.set(keys[index], blocks[index])
+        output = splice(skeleton['output'], [entry['output'] for entry in blocks])
+        if output is None:
+            return None
+        deps = list(skeleton['deps'])
+        for entry in blocks:
+            deps.extend(dependency for dependency in entry['deps'] if dependency not in deps)
+        return {
+            'output': output,
+            'error_level': max([skeleton['error_level']] + [entry['error_level'] for entry in blocks]),
+            'deps': deps,
+            'with_deps': skeleton['with_deps'],
+            'with_document': skeleton['with_document'],
         }
-        if itemprop:
-            kwargs['itemprop'] = itemprop
-        if classes:
-            kwargs['class'] = classes
-        super(ItemScope, self).__init__('', **kwargs)
-        self.tagname = tagname
-        self.compact = tagname == 'p' or compact
-
-
-class ItemScopeDirective(Directive):
-    required_arguments = 1
-    has_content = True
-    option_spec = {
-        'tag': directives.unchanged,
-        'itemprop': directives.unchanged,
-        'compact': directives.unchanged,
-        'class': directives.unchanged,
-    }
-
-    def run(self):
-        # Raise an error if the directive does not have contents.
-        self.assert_has_content()
-        itemtype = self.arguments[0]
-        tag = self.options.get('tag', 'div')
-        itemprop = self.options.get('itemprop', None)
-        compact = 'compact' in self.options
-        classes = self.options.get('class', None)
-        node = ItemScope(tag, itemtype, itemprop, compact, classes)
-        self.add_name(node)
-        self.state.nested_parse(self.content, self.content_offset, node)
-        return [node]
-
-
-def visit_ItemProp(self, node):
-    if not node['tag']:
-        node['tag'] = 'span'
-
-    if node['name'] == 'url':
-        node['tag'] = 'a'
-        self.body.append(self.starttag(node, node['tag'], '', itemprop=node['name'], href=node['info']))
-    elif node['tag'] == 'img':
-        self.body.append(self.emptytag(node, node['tag'], '', itemprop=node['name'], src=node['info']))
-    elif node['tag'] == 'time':
-        # TODO: auto convert the time
-        self.body.append(self.starttag(node, node['tag'], '', itemprop=node['name'], datetime=node['info']))
-    elif node['tag'] == 'meta':
-        # TODO: auto convert the time
-        self.body.append(self.emptytag(node, node['tag'], '', itemprop=node['name'], content=node['info']))
-    else:
-        self.body.append(self.starttag(node, node['tag'], '', itemprop=node['name']))
-
-
-def depart_ItemProp(self, node):
-    end_tag = '</' + node['tag'] + '>'
-    if node['tag'] == 'img' or node['tag'] == 'meta':
-        return
-    self.body.append(end_tag)
-
-
-def visit_ItemPropBlock(self, node):
-    self.body.append(node.starttag())
-
-
-def depart_ItemPropBlock(self, node):
-    self.body.append(node.endtag())
-
-
-def visit_ItemScope(self, node):
-    self.context.append(self.compact_simple)
-    self.compact_simple = node.compact
-    self.body.append(node.starttag())
-
-
-def depart_ItemScope(self, node):
-    self.compact_simple = self.context.pop()
-    self.body.append(node.endtag())
+
+    def wrapper(source, *args, **kwargs):
+        if kwargs.get('settings_overrides') is None or not any(marker in source for marker in MICRODATA_MARKERS):
+            return rst2html(source, *args, **kwargs)
+        settings = settings_of(args, kwargs)
+        key = cache.key(__version__, versions, salt, settings, source)
+        entry = cache.get(key)
+        if entry is None and blocks:
+            entry = render_blocks(source, settings, args, kwargs)
+            if entry is not None:
+                cache.set(key, entry)
+        if entry is not None:
+            return result_of(entry)
+        result = rst2html(source, *args, **kwargs)
+        entry = entry_of(result)
+        if entry is not None:
+            cache.set(key, entry)
+        return result
+    wrapper.uncached = rst2html
+    return wrapper
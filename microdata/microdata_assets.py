@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+import os
+import sys
+
+from nikola.plugin_categories import LateTask
+from nikola.utils import LOGGER
+
+try:
+    import microdata  # noqa: F401
+except ImportError:
+    # Site plugins are loaded from their file, the package is the folder of it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microdata.assets import DEFAULT_THREADS, AssetProber, assets_folder, check_assets, probes_path
+
+
+class MicrodataAssetsTask(LateTask):
+    """Check the assets of the microdata once every file is written."""
+
+    name = "check_microdata_assets"
+
+    def gen_tasks(self):
+        # Nikola makes render_site depend on every task plugin
+        yield self.group_task()
+        config = self.site.config
+        mode = config.get('MICRODATA_ASSETS', False)
+        if not mode:
+            return
+        permalinks = dict((os.path.abspath(post.source_path), post.permalink(absolute=True))
+                          for post in self.site.timeline)
+        yield {
+            'basename': self.name,
+            'name': 'assets',
+            'actions': [(report_assets, (assets_folder(config), probes_path(config), permalinks,
+                                         config.get('BASE_URL') or config['SITE_URL'], config['OUTPUT_FOLDER'],
+                                         config.get('MICRODATA_ASSETS_THREADS', DEFAULT_THREADS), mode != 'warn'))],
+            'uptodate': [False],
+        }
+
+
+def report_assets(folder, path, permalinks, site_url, output_folder, threads, strict):
+    prober = AssetProber(path, threads)
+    problems = check_assets(folder, prober, permalinks, site_url, output_folder)
+    prober.save()
+    log = LOGGER.error if strict else LOGGER.warn
+    for source, line, message in problems:
+        log('{0}:{1}: {2}'.format(source, line or '?', message))
+    if problems:
+        log('{0} microdata asset problems found'.format(len(problems)))
+    return not (strict and problems)
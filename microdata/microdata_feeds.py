@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+import os
+import sys
+
+from nikola.plugin_categories import Task
+from nikola.utils import LOGGER
+
+try:
+    import microdata  # noqa: F401
+except ImportError:
+    # Site plugins are loaded from their file, the package is the folder of it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microdata import vocabulary
+from microdata.feeds import Feed, feeds_folder
+from microdata.index import RecordStore, records_folder
+
+
+class MicrodataFeedsTask(Task):
+
+    name = "render_microdata_feeds"
+
+    def gen_tasks(self):
+        # Nikola makes render_site depend on every task plugin
+        yield self.group_task()
+        config = self.site.config
+        feeds = config.get('MICRODATA_FEEDS')
+        if not feeds:
+            return
+        base_url = config.get('BASE_URL') or config.get('SITE_URL', '')
+        urls = dict((os.path.abspath(post.source_path), post.permalink(absolute=True))
+                    for post in self.site.timeline)
+        vocab = vocabulary.get_vocabulary()
+        for path, options in sorted(feeds.items()):
+            if not isinstance(options, dict):
+                options = {'itemtype': options}
+            feed = Feed(os.path.join(config['OUTPUT_FOLDER'], path), vocab.itemtype(options['itemtype']),
+                        feeds_folder(config), options.get('columns'), vocab)
+            yield {
+                'basename': self.name,
+                'name': feed.path,
+                'actions': [(update_feed, (feed, records_folder(config), urls, base_url))],
+                'targets': [feed.path],
+                'task_dep': ['render_posts'],
+                'clean': True,
+            }
+
+
+def update_feed(feed, folder, urls, base_url):
+    written, removed = feed.update(RecordStore(folder), urls, base_url)
+    LOGGER.info('Microdata feed {0}: {1} posts written, {2} removed'.format(feed.path, written, removed))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+import os
+import sys
+
+from nikola.plugin_categories import Task
+from nikola.utils import LOGGER
+
+try:
+    import microdata  # noqa: F401
+except ImportError:
+    # Site plugins are loaded from their file, the package is the folder of it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microdata.index import MicrodataIndex, RecordStore, index_path, records_folder
+
+
+class MicrodataIndexTask(Task):
+
+    name = "render_microdata_index"
+
+    def gen_tasks(self):
+        # Nikola makes render_site depend on every task plugin
+        yield self.group_task()
+        config = self.site.config
+        if not config.get('MICRODATA_INDEX', False):
+            return
+        path = index_path(config)
+        yield {
+            'basename': self.name,
+            'name': path,
+            'actions': [(update_index, (records_folder(config), path))],
+            'targets': [path],
+            'task_dep': ['render_posts'],
+            'clean': True,
+        }
+
+
+def update_index(folder, path):
+    index = MicrodataIndex(path)
+    try:
+        updated, removed = index.update(RecordStore(folder))
+    finally:
+        index.close()
+    LOGGER.info('Microdata index: {0} posts indexed, {1} removed'.format(updated, removed))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+import os
+import sys
+
+from nikola.plugin_categories import Task
+from nikola.utils import LOGGER
+
+try:
+    import microdata  # noqa: F401
+except ImportError:
+    # Site plugins are loaded from their file, the package is the folder of it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microdata import vocabulary
+from microdata.feeds import feeds_folder
+from microdata.index import RecordStore, records_folder
+from microdata.search import ImageSitemap, SearchIndex, search_path, sitemap_path
+
+
+class MicrodataSearchTask(Task):
+
+    name = "render_microdata_search"
+
+    def gen_tasks(self):
+        # Nikola makes render_site depend on every task plugin
+        yield self.group_task()
+        config = self.site.config
+        outputs = []
+        if config.get('MICRODATA_SITEMAP'):
+            outputs.append(ImageSitemap(sitemap_path(config), feeds_folder(config)))
+        search = config.get('MICRODATA_SEARCH')
+        if search:
+            itemtypes = None
+            if search is not True:
+                vocab = vocabulary.get_vocabulary()
+                itemtypes = [vocab.itemtype(name) for name in search]
+            outputs.append(SearchIndex(search_path(config), feeds_folder(config), itemtypes))
+        if not outputs:
+            return
+        base_url = config.get('BASE_URL') or config.get('SITE_URL', '')
+        urls = dict((os.path.abspath(post.source_path), post.permalink(absolute=True))
+                    for post in self.site.timeline)
+        for output in outputs:
+            yield {
+                'basename': self.name,
+                'name': output.path,
+                'actions': [(update_output, (output, records_folder(config), urls, base_url))],
+                'targets': [output.path],
+                'task_dep': ['render_posts'],
+                'clean': True,
+            }
+
+
+def update_output(output, folder, urls, base_url):
+    written, removed = output.update(RecordStore(folder), urls, base_url)
+    LOGGER.info('Microdata {0}: {1} posts written, {2} removed'.format(output.path, written, removed))
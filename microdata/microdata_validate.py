@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import os
+import sys
+
+from nikola.plugin_categories import Task
+from nikola.utils import LOGGER
+
+try:
+    import microdata  # noqa: F401
+except ImportError:
+    # Site plugins are loaded from their file, the package is the folder of it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microdata.validation import collect, problems_folder
+
+
+class MicrodataValidateTask(Task):
+
+    name = "validate_microdata"
+
+    def gen_tasks(self):
+        # Nikola makes render_site depend on every task plugin
+        yield self.group_task()
+        config = self.site.config
+        mode = config.get('MICRODATA_VALIDATE', False)
+        if not mode:
+            return
+        yield {
+            'basename': self.name,
+            'name': 'problems',
+            'actions': [(report_problems, (problems_folder(config), mode != 'warn'))],
+            'task_dep': ['render_posts'],
+            'uptodate': [False],
+        }
+
+
+def report_problems(folder, strict):
+    problems = collect(folder)
+    log = LOGGER.error if strict else LOGGER.warn
+    for source, line, message in problems:
+        log('{0}:{1}: {2}'.format(source, line or '?', message))
+    if problems:
+        log('{0} microdata problems found'.format(len(problems)))
+    return not (strict and problems)
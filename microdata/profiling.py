@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import time
+
+from microdata.index import source_path
+
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class Profiler(object):
+    """Count the calls and accumulate the time of the plugin hooks, per post.
+
+    Hooks are wrapped with :meth:`timed` when they are registered, so
+    nothing is measured nor slowed down unless a profiler is used. Nested
+    hooks (e.g. roles parsed by an itemscope directive) are accounted in
+    both the inclusive ``time`` and the exclusive ``self_time``.
+    """
+
+    def __init__(self):
+        # (source, hook) -> [calls, time, self_time]
+        self.stats = {}
+        # name -> LRUCache whose counters are reported
+        self.caches = {}
+        self._children = []
+
+    def timed(self, name, func, document_of):
+        """Wrap ``func``, ``document_of`` returns the document from its arguments."""
+        def wrapper(*args, **kwargs):
+            self._children.append(0.0)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                children = self._children.pop()
+                if self._children:
+                    self._children[-1] += elapsed
+                source = source_path(document_of(*args)) or '<string>'
+                stat = self.stats.setdefault((source, name), [0, 0.0, 0.0])
+                stat[0] += 1
+                stat[1] += elapsed
+                stat[2] += elapsed - children
+        wrapper.__name__ = str(getattr(func, '__name__', name))
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def report(self):
+        hooks = {}
+        posts = {}
+        for (source, name), (calls, elapsed, self_time) in self.stats.items():
+            hook = hooks.setdefault(name, {'calls': 0, 'time': 0.0, 'self_time': 0.0})
+            hook['calls'] += calls
+            hook['time'] += elapsed
+            hook['self_time'] += self_time
+            post = posts.setdefault(source, {'source': source, 'calls': 0, 'time': 0.0, 'hooks': {}})
+            post['calls'] += calls
+            post['time'] += self_time
+            post['hooks'][name] = {'calls': calls, 'time': elapsed, 'self_time': self_time}
+        return {
+            'hooks': hooks,
+            'posts': sorted(posts.values(), key=lambda p: p['time'], reverse=True),
+            'caches': dict((name, {'hits': cache.hits, 'misses': cache.misses, 'size': len(cache)})
+                           for name, cache in self.caches.items()),
+        }
+
+    def table(self, report, top=10):
+        lines = ['{0:<60} {1:>8} {2:>10}'.format('post', 'calls', 'time (ms)')]
+        for post in report['posts'][:top]:
+            lines.append('{0:<60} {1:>8} {2:>10.1f}'.format(post['source'][-60:], post['calls'], post['time'] * 1000))
+        return '\n'.join(lines)
+
+    def write(self, path, top=10):
+        """Write the JSON report at ``path`` and return the top ``top`` posts table."""
+        report = self.report()
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with io.open(path, 'w', encoding='utf8') as f:
+            f.write(json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False))
+        return self.table(report, top)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+import io
+import multiprocessing
+
+from docutils.core import publish_programmatically
+import docutils.frontend
+import docutils.io
+import docutils.readers.standalone
+import docutils.utils
+import docutils.writers
+import docutils.writers.html4css1
+
+from microdata import extract
+from microdata.rst import register
+
+
+def writer_name():
+    """The docutils writer patched by Nikola ``add_node``."""
+    if hasattr(docutils.writers.html4css1.HTMLTranslator, 'visit_ItemScope'):
+        return 'html4css1'
+    return 'html5_polyglot'
+
+
+def render(text, settings_overrides=None, source_path=None):
+    """Render the rST ``text``.
+
+    Return the HTML fragment and the microdata items of the document.
+    """
+    _, publisher = publish_programmatically(
+        source_class=docutils.io.StringInput, source=text, source_path=source_path,
+        destination_class=docutils.io.StringOutput, destination=None, destination_path=None,
+        reader=None, reader_name='standalone',
+        parser=None, parser_name='restructuredtext',
+        writer=None, writer_name=writer_name(),
+        settings=None, settings_spec=None, settings_overrides=settings_overrides,
+        config_section=None, enable_exit_status=False)
+    return publisher.writer.parts['fragment'], extract.extract_items(publisher.document)
+
+
+class BatchRenderer(object):
+    """Render many rST snippets into HTML fragments.
+
+    The reader, parser, writer, settings and node visitors are set up once
+    and shared by every snippet, instead of once per ``publish_parts`` call.
+    Nothing is kept from one snippet to the next.
+    """
+
+    def __init__(self, settings_overrides=None):
+        register()
+        self.reader = docutils.readers.standalone.Reader(parser_name='restructuredtext')
+        self.parser = self.reader.parser
+        self.writer = docutils.writers.get_writer_class(writer_name())()
+        components = (self.parser, self.reader, self.writer)
+        try:
+            self.settings = docutils.frontend.get_default_settings(*components)
+        except AttributeError:  # docutils < 0.19
+            self.settings = docutils.frontend.OptionParser(components=components).get_default_values()
+        self.settings._update(settings_overrides or {}, 'loose')
+
+    def render(self, text, source_path='<string>'):
+        """Render a single snippet and return its HTML fragment."""
+        document = docutils.utils.new_document(source_path, self.settings)
+        self.parser.parse(text, document)
+        document.current_source = document.current_line = None
+        document.transformer.populate_from_components((self.reader, self.parser, self.writer))
+        document.transformer.apply_transforms()
+        visitor = self.writer.translator_class(document)
+        document.walkabout(visitor)
+        return ''.join(visitor.fragment)
+
+    def render_iter(self, snippets):
+        """Lazily render an iterable of snippets, yielding their fragments."""
+        for text in snippets:
+            yield self.render(text)
+
+
+_settings_overrides = None
+
+
+def _init_worker(settings_overrides, consumers, config):
+    # Registrations and settings are process-wide, so they are done again in
+    # every worker (spawned workers do not inherit them from the parent).
+    global _settings_overrides
+    _settings_overrides = settings_overrides
+    if config is None:
+        register()
+        extract.consumers[:] = consumers
+    else:
+        from microdata.microdata import configure_vocabulary, setup
+        configure_vocabulary(config)
+        setup(config)
+
+
+def _render_file(path):
+    with io.open(path, 'r', encoding='utf8') as f:
+        text = f.read()
+    fragment, items = render(text, _settings_overrides, path)
+    return path, fragment, items
+
+
+def render_parallel(paths, processes=None, settings_overrides=None, chunksize=4, config=None):
+    """Render the rST files at ``paths`` in a pool of ``processes`` workers.
+
+    Yield ``(path, fragment, items)`` tuples in the order of ``paths``. With
+    the site ``config``, the workers set up the vocabulary, the output
+    settings and the extraction consumers from it, as the plugin does.
+    Otherwise they use the default vocabulary and settings, and the
+    extraction consumers registered in the parent.
+
+    This is a standalone tool, not a faster ``nikola build``: the files are
+    rendered by plain docutils with only the microdata directives and role,
+    so Nikola's own directives, shortcodes, metadata and settings overrides
+    are not applied and the fragments differ from the pages of the site.
+    """
+    pool = multiprocessing.Pool(processes, _init_worker, (settings_overrides, list(extract.consumers), config))
+    try:
+        for result in pool.imap(_render_file, paths, chunksize):
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
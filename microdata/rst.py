@@ -0,0 +1,454 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import re
+import sys
+
+from docutils import nodes
+from docutils.parsers.rst import directives, Directive, roles, states
+from docutils.statemachine import StringList
+from nikola.plugins.compile.rest import add_node
+
+from microdata import dependencies, extract, validation
+from microdata.cache import DiskCache
+from microdata.core import (BLOCK_TAG, RE_OTHER_DIRECTIVE, block_attributes, html_tags, is_compact, parse_role,
+                            prop_element, prop_tags, scope_attributes)
+
+# Python frames docutils uses to parse the content of a nested directive
+FRAMES_PER_LEVEL = 16
+RECURSION_MARGIN = 500
+
+# A directive option whose value docutils would parse as a single plain word
+# or several space-separated ones
+RE_SIMPLE_OPTION = re.compile(r'^:([a-z]+):(?: +([A-Za-z0-9][A-Za-z0-9-]*(?: [A-Za-z0-9][A-Za-z0-9-]*)*))? *$')
+
+# Whether the microdata elements are written compacted, see write_children()
+compact_output = False
+
+# LRUCache of the parsed content of the directives, see parse_content()
+parse_cache = None
+
+# Nodes parsed without side effects on the document, which can be copied
+CACHEABLE_NODES = frozenset([
+    'Text', 'paragraph', 'emphasis', 'strong', 'literal', 'inline', 'reference', 'bullet_list',
+    'enumerated_list', 'list_item', 'definition_list', 'definition_list_item', 'term', 'definition',
+    'field_list', 'field', 'field_name', 'field_body', 'block_quote', 'line_block', 'line',
+    'literal_block', 'ItemProp', 'ItemPropBlock', 'ItemScope',
+])
+
+
+def register(profiler=None):
+    """Register the directives, role and nodes of the plugin with docutils.
+
+    When a :class:`~microdata.profiling.Profiler` is given, the hooks are
+    registered wrapped with its timers.
+    """
+    scope_directive, prop_directive, role = ItemScopeDirective, ItemPropDirective, itemprop_role
+    visitors = [
+        (ItemProp, visit_ItemProp, depart_ItemProp),
+        (ItemPropBlock, visit_ItemPropBlock, depart_ItemPropBlock),
+        (ItemScope, visit_ItemScope, depart_ItemScope),
+    ]
+    if profiler is not None:
+        scope_directive = profiled_directive(profiler, ItemScopeDirective)
+        prop_directive = profiled_directive(profiler, ItemPropDirective)
+        role = profiler.timed('itemprop_role', itemprop_role, lambda *args: args[4].document)
+        visitors = [(node, profiler.timed(visit.__name__, visit, lambda self, node: self.document),
+                     profiler.timed(depart.__name__, depart, lambda self, node: self.document))
+                    for node, visit, depart in visitors]
+
+    directives.register_directive('itemscope', scope_directive)
+    directives.register_directive('itempropblock', prop_directive)
+    roles.register_canonical_role('itemprop', role)
+    # Replace the role docutils cached if it was already looked up
+    roles.register_local_role('itemprop', role)
+    for node, visit, depart in visitors:
+        add_node(node, visit, depart)
+
+
+def profiled_directive(profiler, directive):
+    """Subclass ``directive`` with a timed ``run`` method."""
+    run = profiler.timed(directive.__name__ + '.run', directive.run, lambda self: self.state.document)
+    return type(str(directive.__name__), (directive,), {'run': run})
+
+
+class ItemProp(nodes.Inline, nodes.TextElement):
+    """An inline itemprop.
+
+    Its parsed role is kept in ``prop``, identical roles sharing the same
+    immutable ``Prop`` instance instead of per-node attributes.
+    """
+
+    def __init__(self, rawsource='', text='', *children, **attributes):
+        self.prop = attributes.pop('prop', None)
+        super(ItemProp, self).__init__(rawsource, text, *children, **attributes)
+
+    def copy(self):
+        obj = super(ItemProp, self).copy()
+        obj.prop = self.prop
+        return obj
+
+
+def itemprop_role(role, rawtext, text, lineno, inliner, options={}, content=[]):
+    extract.note_document(inliner.document)
+    try:
+        prop = parse_role(text)
+    except ValueError as error:
+        if not validation.enabled:
+            raise
+        validation.report(inliner.document, lineno, error.args[0])
+        msg = inliner.reporter.error(error.args[0], line=lineno)
+        prb = inliner.problematic(rawtext, rawtext, msg)
+        return [prb], [msg]
+    if dependencies.tracker is not None:
+        dependencies.tracker.record(inliner.document, 'properties', prop.name)
+    return [ItemProp(prop.value, prop.value, prop=prop)], []
+
+
+def copy_element(node, *names):
+    """Copy an element whose constructor does not take its attributes."""
+    obj = node.__class__.__new__(node.__class__)
+    nodes.Element.__init__(obj, node.rawsource, **node.attributes)
+    for name in ('tagname', 'source', 'line') + names:
+        setattr(obj, name, getattr(node, name))
+    return obj
+
+
+def nested_parse(directive, node):
+    """Parse the content of ``directive`` into ``node``.
+
+    docutils parses nested directives recursively, so the recursion limit is
+    raised along with the nesting depth of the microdata directives, and
+    restored once the outermost directive is parsed.
+    """
+    document = directive.state.document
+    depth = getattr(document, 'microdata_depth', 0) + 1
+    if depth == 1:
+        document.microdata_recursion_limit = sys.getrecursionlimit()
+    needed = depth * FRAMES_PER_LEVEL + RECURSION_MARGIN
+    if sys.getrecursionlimit() < needed:
+        sys.setrecursionlimit(needed)
+    document.microdata_depth = depth
+    try:
+        directive.state.nested_parse(directive.content, directive.content_offset, node)
+    finally:
+        document.microdata_depth = depth - 1
+        if depth == 1:
+            sys.setrecursionlimit(document.microdata_recursion_limit)
+
+
+def is_cacheable(node):
+    """Whether the children of ``node`` only hold self-contained nodes."""
+    stack = list(node.children)
+    while stack:
+        child = stack.pop()
+        if child.__class__.__name__ not in CACHEABLE_NODES:
+            return False
+        if isinstance(child, nodes.Element):
+            if child['ids'] or child['names'] or 'refname' in child or 'refid' in child:
+                return False
+            stack.extend(child.children)
+    return True
+
+
+def copy_children(children, source, delta):
+    """Deep-copy ``children``, moving them to ``source`` and ``delta`` lines below."""
+    copies = [child.deepcopy() for child in children]
+    stack = list(copies)
+    while stack:
+        child = stack.pop()
+        if isinstance(child, nodes.Element):
+            child.source = source
+            if child.line is not None:
+                child.line += delta
+            stack.extend(child.children)
+    return copies
+
+
+def parse_content(directive, node):
+    """Parse the content of ``directive`` into ``node``, through ``parse_cache``.
+
+    Subtrees are cached by content and options, along with the dependencies
+    recorded while parsing them, and deep-copied on hits. Content using other
+    directives or parsing into references, targets or messages is not cached.
+    """
+    if parse_cache is None:
+        return nested_parse(directive, node)
+    document = directive.state.document
+    tracker = dependencies.tracker
+    text = '\n'.join(directive.content)
+    key = DiskCache.key(node.__class__.__name__, directive.arguments[0], repr(sorted(directive.options.items())),
+                        getattr(roles._roles.get(''), '__name__', ''), text)
+    entry = parse_cache.get(key)
+    if entry is not None:
+        line, children, recorded = entry
+        node.extend(copy_children(children, node.source, (node.line or 0) - (line or 0)))
+        extract.note_document(document)
+        if tracker is not None:
+            for kind, name in recorded:
+                tracker.record(document, kind, name)
+        return
+    if tracker is not None:
+        seen = getattr(document, 'microdata_dependencies', None)
+        document.microdata_dependencies = set()
+    try:
+        nested_parse(directive, node)
+    finally:
+        recorded = ()
+        if tracker is not None:
+            recorded = frozenset(document.microdata_dependencies)
+            document.microdata_dependencies = seen
+            for kind, name in recorded:
+                tracker.record(document, kind, name)
+    if not RE_OTHER_DIRECTIVE.search(text) and is_cacheable(node):
+        parse_cache.set(key, (node.line, [child.deepcopy() for child in node.children], recorded))
+
+
+class ItemPropBlock(nodes.Element):
+    def __init__(self, tagname, itemprop, classes=None):
+        super(ItemPropBlock, self).__init__('', **block_attributes(itemprop, classes))
+        self.tagname = tagname
+
+    def copy(self):
+        return copy_element(self)
+
+
+class MicrodataDirective(Directive):
+    """Base of the plugin directives, which parse their own options.
+
+    docutils parses directive options as a field list with a new nested state
+    machine for every directive, a large part of the parsing time of pages with
+    many itemscopes. The plugin directives declare no ``option_spec``, so their
+    options reach them as the last lines of their argument: plain options are
+    converted directly, anything else goes through docutils.
+    """
+    required_arguments = 1
+    final_argument_whitespace = True
+    has_content = True
+    # The option_spec docutils would use
+    microdata_options = {}
+
+    def parse_options(self):
+        """Split the options from the argument into ``self.options``."""
+        lines = self.arguments[0].split('\n')
+        for index, line in enumerate(lines):
+            if re.match(states.Body.patterns['field_marker'], line):
+                break
+        else:
+            index = len(lines)
+        arguments = '\n'.join(lines[:index]).split()
+        if not arguments:
+            raise self.error('1 argument(s) required, 0 supplied')
+        if len(arguments) > 1:
+            raise self.error('maximum 1 argument(s) allowed, %s supplied' % len(arguments))
+        self.arguments[0] = arguments[0]
+        option_lines = lines[index:]
+        options = {}
+        for line in option_lines:
+            match = RE_SIMPLE_OPTION.match(line)
+            if not match or match.group(1) not in self.microdata_options or match.group(1) in options:
+                break
+            options[match.group(1)] = self.microdata_options[match.group(1)](match.group(2))
+        else:
+            self.options.update(options)
+            return
+        source, line = self.state_machine.get_source_and_line(self.lineno)
+        success, data = self.state.parse_extension_options(self.microdata_options, StringList(option_lines, source))
+        if not success:
+            raise self.error(data)
+        self.options.update(data)
+
+
+class ItemPropDirective(MicrodataDirective):
+    microdata_options = {
+        'tag': directives.unchanged,
+        'class': directives.unchanged,
+    }
+
+    def run(self):
+        self.parse_options()
+        # Raise an error if the directive does not have contents.
+        self.assert_has_content()
+        itemprop = self.arguments[0]
+        tag = self.options.get('tag', BLOCK_TAG)
+        classes = self.options.get('class', None)
+        node = ItemPropBlock(tag, itemprop, classes)
+        node.source, node.line = self.state_machine.get_source_and_line(self.lineno)
+        self.add_name(node)
+        parse_content(self, node)
+        return [node]
+
+
+class ItemScope(nodes.Element):
+    def __init__(self, tagname, itemtype, itemprop=None, compact=False, classes=None):
+        # itemtype_url() returns the same string for every node of a given type
+        super(ItemScope, self).__init__('', **scope_attributes(itemtype, itemprop, classes))
+        self.tagname = tagname
+        self.compact = is_compact(tagname, compact)
+
+    def copy(self):
+        return copy_element(self, 'compact')
+
+
+class ItemScopeDirective(MicrodataDirective):
+    microdata_options = {
+        'tag': directives.unchanged,
+        'itemprop': directives.unchanged,
+        'compact': directives.unchanged,
+        'class': directives.unchanged,
+    }
+
+    def run(self):
+        self.parse_options()
+        # Raise an error if the directive does not have contents.
+        self.assert_has_content()
+        itemtype = self.arguments[0]
+        tag = self.options.get('tag', BLOCK_TAG)
+        itemprop = self.options.get('itemprop', None)
+        compact = 'compact' in self.options
+        classes = self.options.get('class', None)
+        node = ItemScope(tag, itemtype, itemprop, compact, classes)
+        node.source, node.line = self.state_machine.get_source_and_line(self.lineno)
+        self.add_name(node)
+        extract.note_document(self.state.document)
+        if dependencies.tracker is not None:
+            dependencies.tracker.record(self.state.document, 'types', itemtype)
+        parse_content(self, node)
+        return [node]
+
+
+# Attributes of the itemscope and itempropblock nodes, in the rendered order
+ELEMENT_ATTRIBUTES = ('class', 'itemprop', 'itemscope', 'itemtype')
+
+
+def has_list_attributes(node):
+    """Whether ``node`` has ids, classes... rendered by docutils."""
+    attributes = node.attributes
+    for name in node.list_attributes:
+        if attributes[name]:
+            return True
+    return False
+
+
+def element_tags(node):
+    """Return the opening and closing tags of an itemscope or itempropblock node."""
+    if has_list_attributes(node):
+        start = node.starttag()
+        if compact_output:
+            start = start.replace(' itemscope="itemscope"', ' itemscope')
+        return start, node.endtag()
+    attributes = node.attributes
+    return html_tags(node.tagname, tuple((name, attributes[name]) for name in ELEMENT_ATTRIBUTES
+                                         if name in attributes), False, compact_output)
+
+
+def plain_prop(paragraph):
+    """Return the itemprop of a paragraph only holding an itemprop written
+    as a bare ``span``, ``None`` otherwise."""
+    if len(paragraph) != 1 or has_list_attributes(paragraph):
+        return None
+    node = paragraph[0]
+    if node.__class__.__name__ != 'ItemProp' or has_list_attributes(node):
+        return None
+    tag, attributes, empty = prop_element(node.prop)
+    if tag != 'span' or empty or len(attributes) != 1:
+        return None
+    return node
+
+
+def is_compact_paragraph(translator, paragraph):
+    """Whether the writer omits the ``<p>`` tags of ``paragraph``."""
+    should_be_compact = getattr(translator, 'should_be_compact_paragraph', None)
+    return bool(should_be_compact and should_be_compact(paragraph))
+
+
+def write_children(self, node):
+    """Write the children of ``node`` in compact output mode.
+
+    A paragraph only holding a plain itemprop carries the itemprop itself
+    instead of wrapping a ``span``, e.g. ``<p itemprop="name">Pie</p>``.
+    The visitor must then skip the children of ``node``.
+    """
+    for child in node.children:
+        prop = plain_prop(child) if isinstance(child, nodes.paragraph) else None
+        if prop is None or is_compact_paragraph(self, child):
+            child.walkabout(self)
+            continue
+        start, end = html_tags('p', (('itemprop', prop.prop.name),))
+        self.body.append(start)
+        for text in prop.children:
+            text.walkabout(self)
+        self.body.append(end + '\n')
+
+
+def visit_ItemProp(self, node):
+    if has_list_attributes(node):
+        tag, attributes, empty = prop_element(node.prop)
+        if empty:
+            self.body.append(self.emptytag(node, tag, '', **attributes))
+        else:
+            self.body.append(self.starttag(node, tag, '', **attributes))
+    else:
+        self.body.append(prop_tags(node.prop)[0])
+
+
+def depart_ItemProp(self, node):
+    end = prop_tags(node.prop)[1]
+    if end:
+        self.body.append(end)
+
+
+def visit_ItemPropBlock(self, node):
+    if (compact_output and node.tagname == BLOCK_TAG and len(node) == 1 and isinstance(node[0], nodes.paragraph)
+            and not has_list_attributes(node) and not has_list_attributes(node[0])
+            and not is_compact_paragraph(self, node[0])):
+        # The block and its single paragraph are written as one element
+        start, end = html_tags('p', tuple((name, node[name]) for name in ELEMENT_ATTRIBUTES if name in node))
+        self.body.append(start)
+        self.context.append(end)
+        write_children(self, node[0])
+        raise nodes.SkipChildren
+    start, end = element_tags(node)
+    self.body.append(start)
+    self.context.append(end)
+    if compact_output:
+        write_children(self, node)
+        raise nodes.SkipChildren
+
+
+def depart_ItemPropBlock(self, node):
+    self.body.append(self.context.pop())
+
+
+def visit_ItemScope(self, node):
+    self.context.append(self.compact_simple)
+    self.compact_simple = node.compact
+    start, end = element_tags(node)
+    self.body.append(start)
+    self.context.append(end)
+    if compact_output:
+        write_children(self, node)
+        raise nodes.SkipChildren
+
+
+def depart_ItemScope(self, node):
+    end = self.context.pop()
+    self.compact_simple = self.context.pop()
+    self.body.append(end)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Image sitemap and search index of the microdata items.
+
+Both are built from the item records like the feeds: the entries of each post
+are kept in a part file only written again when the post changes.
+"""
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import json
+import os
+import re
+
+try:
+    from urllib.parse import urljoin
+except ImportError:  # Python 2
+    from urlparse import urljoin
+
+from microdata.feeds import PartedFile, feed_items, item_url
+
+SITEMAP_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                  '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+                  'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n')
+SITEMAP_FOOTER = '</urlset>\n'
+
+RE_WORD = re.compile(r'\w+', re.U)
+MIN_WORD_LENGTH = 2
+
+
+def escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def sitemap_path(config):
+    path = config.get('MICRODATA_SITEMAP')
+    if path is True:
+        path = 'sitemap-microdata.xml'
+    return os.path.join(config['OUTPUT_FOLDER'], path)
+
+
+def search_path(config):
+    return os.path.join(config['OUTPUT_FOLDER'], config.get('MICRODATA_SEARCH_PATH', 'microdata-search.json'))
+
+
+class ImageSitemap(PartedFile):
+    """A sitemap of the posts with the images of their ``img`` itemprops."""
+
+    def header(self):
+        return SITEMAP_HEADER
+
+    def footer(self):
+        return SITEMAP_FOOTER
+
+    def lines(self, record, url=None):
+        images = record.get('images')
+        if not url or not images:
+            return
+        entry = ['<url><loc>{0}</loc>'.format(escape(url))]
+        for image in OrderedDict((urljoin(url, image), None) for image in images):
+            entry.append('<image:image><image:loc>{0}</image:loc></image:image>'.format(escape(image)))
+        entry.append('</url>\n')
+        yield ''.join(entry)
+
+
+def item_words(item):
+    """Return the sorted words of the values of an item, nested ones included."""
+    words = set()
+    stack = [item]
+    while stack:
+        item = stack.pop()
+        for values in item['properties'].values():
+            for value in values:
+                if isinstance(value, dict):
+                    stack.append(value)
+                else:
+                    words.update(word for word in RE_WORD.findall(value.lower()) if len(word) >= MIN_WORD_LENGTH)
+    return sorted(words)
+
+
+class SearchIndex(PartedFile):
+    """An inverted index of the items of ``itemtypes``, for client-side search.
+
+    The JSON index holds the ``documents``, each one the ``[url, name,
+    type]`` of an item, and the ``index`` mapping every word of the values
+    of the items to the sorted positions of their documents. Without
+    ``itemtypes``, the top-level items are indexed.
+    """
+
+    def __init__(self, path, folder, itemtypes=None):
+        super(SearchIndex, self).__init__(path, folder)
+        self.itemtypes = sorted(itemtypes or ())
+
+    def fingerprint(self, base_url=''):
+        return repr((self.__class__.__name__, self.itemtypes, base_url))
+
+    def items(self, record):
+        if not self.itemtypes:
+            return record['items']
+        return feed_items(record['items'], frozenset(self.itemtypes))
+
+    def lines(self, record, url=None):
+        for item in self.items(record):
+            names = item['properties'].get('name') or ['']
+            name = names[0] if not isinstance(names[0], dict) else ''
+            document = [item_url(item, url), name, item['type'].rsplit('/', 1)[-1]]
+            yield json.dumps([document, item_words(item)], ensure_ascii=False) + '\n'
+
+    def stream(self, names):
+        documents = []
+        index = {}
+        for line in self.part_lines(names):
+            document, words = json.loads(line)
+            for word in words:
+                index.setdefault(word, []).append(len(documents))
+            documents.append(document)
+        data = OrderedDict([('documents', documents), ('index', OrderedDict(sorted(index.items())))])
+        yield json.dumps(data, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import os
+
+from docutils import nodes
+
+from microdata.index import RecordStore, source_path
+from microdata.vocabulary import get_vocabulary
+
+# Whether the itemprop role reports invalid roles instead of raising
+enabled = False
+
+
+def problems_folder(config):
+    return os.path.join(config.get('CACHE_FOLDER', 'cache'), 'microdata', 'problems')
+
+
+def report(document, line, message):
+    """Record a problem found while parsing ``document``."""
+    if not hasattr(document, 'microdata_problems'):
+        document.microdata_problems = []
+    document.microdata_problems.append({'line': line, 'message': message})
+
+
+def validate(document, vocabulary=None):
+    """Check the microdata of ``document`` against the vocabulary.
+
+    The doctree is walked once. Return the problems, each one a dict with
+    its ``line`` and ``message``.
+    """
+    vocabulary = vocabulary or get_vocabulary()
+    problems = list(getattr(document, 'microdata_problems', ()))
+
+    def problem(line, message, *args):
+        problems.append({'line': line, 'message': message % args})
+
+    # Scopes are None outside of any itemscope and '' in an unknown itemtype
+    stack = [(document, None, None)]
+    while stack:
+        node, scope, line = stack.pop()
+        line = getattr(node, 'line', None) or line
+        kind = node.__class__.__name__
+        if kind == 'ItemScope':
+            itemprop = node.get('itemprop')
+            if itemprop:
+                if scope is None:
+                    problem(line, 'itemscope with itemprop "%s" outside of an itemscope', itemprop)
+                elif scope and itemprop not in vocabulary.properties(scope):
+                    problem(line, 'unknown property "%s" for itemtype "%s"', itemprop, scope)
+            elif scope is not None:
+                problem(line, 'nested itemscope %s without itemprop', node['itemtype'])
+            scope = vocabulary.name(node['itemtype'])
+            if scope is None:
+                # Types of other vocabularies are not checked
+                if node['itemtype'].startswith(vocabulary.url):
+                    problem(line, 'unknown itemtype %s', node['itemtype'])
+                scope = ''
+        elif kind in ('ItemProp', 'ItemPropBlock'):
+            name = node.prop.name if kind == 'ItemProp' else node['itemprop']
+            if scope is None:
+                problem(line, 'itemprop "%s" outside of an itemscope', name)
+            elif scope and name not in vocabulary.properties(scope):
+                problem(line, 'unknown property "%s" for itemtype "%s"', name, scope)
+        if isinstance(node, nodes.Element):
+            stack.extend((child, scope, line) for child in reversed(node.children))
+    problems.sort(key=lambda p: p['line'] or 0)
+    return problems
+
+
+class Validator(object):
+    """Extraction consumer recording the problems of each document."""
+
+    def __init__(self, folder):
+        self.store = RecordStore(folder)
+
+    def __call__(self, document, items):
+        problems = validate(document)
+        if problems:
+            self.store.write(source_path(document), {'problems': problems})
+        else:
+            self.store.remove(source_path(document))
+
+
+def collect(folder):
+    """Return the ``(source, line, message)`` of every recorded problem."""
+    problems = []
+    for record in RecordStore(folder).records():
+        for problem in record['problems']:
+            problems.append((record['source'], problem['line'], problem['message']))
+    problems.sort(key=lambda p: (p[0], p[1] or 0))
+    return problems
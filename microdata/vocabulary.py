@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2013-2014 Axel Haustant, Ivan Teoh and others.
+
+# pelican-microdata is LGPL-licensed.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import os
+import pickle
+
+from microdata import __version__
+
+DEFAULT_VOCABULARY = os.path.join(os.path.dirname(__file__), 'vocabularies', 'data-vocabulary.org.json')
+
+
+class Vocabulary(object):
+    """The types, properties and default tags of a vocabulary.
+
+    Definitions are compiled into plain hash tables: ``types`` maps each
+    type to the frozenset of its properties (inherited ones included) and
+    ``tags`` maps a property to the HTML tag it renders with by default.
+    """
+
+    def __init__(self, url, types, tags, prefixes=None):
+        self.url = url
+        self.types = types
+        self.tags = tags
+        self.prefixes = dict(prefixes or {})
+        self.urls = dict((name, url + name) for name in types)
+        self.names = dict((url + name, name) for name in types)
+        # The URL strings returned by itemtype(), by value
+        self.interned = dict((url, url) for url in self.urls.values())
+
+    @classmethod
+    def compile(cls, definitions):
+        types = {}
+        declared = definitions.get('types', {})
+        for name in declared:
+            properties = set()
+            seen = set()
+            parent = name
+            while parent and parent not in seen:
+                seen.add(parent)
+                definition = declared.get(parent, {})
+                properties.update(definition.get('properties', ()))
+                parent = definition.get('parent')
+            types[name] = frozenset(properties)
+        return cls(definitions.get('url', ''), types, dict(definitions.get('tags', {})))
+
+    def configured(self, url=None, prefixes=None):
+        """Return this vocabulary with another base ``url`` and ``prefixes``."""
+        return Vocabulary(url or self.url, self.types, self.tags, prefixes)
+
+    def __contains__(self, itemtype):
+        return itemtype in self.types
+
+    def itemtype(self, name):
+        """Return the URL of the ``name`` type, the same string for every call.
+
+        ``name`` is a type of the vocabulary, a ``prefix:Type`` of another
+        vocabulary or an absolute URL.
+        """
+        try:
+            return self.urls[name]
+        except KeyError:
+            prefix, colon, local = name.partition(':')
+            if colon and prefix in self.prefixes:
+                url = self.prefixes[prefix] + local
+            elif colon and local.startswith('//'):
+                url = name
+            else:
+                url = self.url + name
+            # Names resolving to the same URL share a single string
+            url = self.urls[name] = self.interned.setdefault(url, url)
+            return url
+
+    def name(self, url):
+        """Return the name of the type at ``url``, ``None`` if unknown."""
+        return self.names.get(url)
+
+    def properties(self, itemtype):
+        return self.types.get(itemtype, frozenset())
+
+    def tag(self, prop):
+        return self.tags.get(prop)
+
+
+def stat_key(path):
+    stat = os.stat(path)
+    return (__version__, os.path.abspath(path), stat.st_mtime, stat.st_size)
+
+
+def load(path, cache_folder=None):
+    """Load the vocabulary defined in the JSON file at ``path``.
+
+    The compiled vocabulary is pickled in ``cache_folder`` and reused as
+    long as the definitions file does not change.
+    """
+    key = stat_key(path)
+    cache_path = None
+    if cache_folder:
+        name = hashlib.sha1(os.path.abspath(path).encode('utf8')).hexdigest()
+        cache_path = os.path.join(cache_folder, 'vocabulary-%s.pickle' % name)
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, vocabulary = pickle.load(f)
+            if cached_key == key:
+                return vocabulary
+        except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+    with io.open(path, 'r', encoding='utf8') as f:
+        vocabulary = Vocabulary.compile(json.load(f))
+    if cache_path:
+        if not os.path.isdir(cache_folder):
+            os.makedirs(cache_folder)
+        with open(cache_path, 'wb') as f:
+            pickle.dump((key, vocabulary), f, 2)
+    return vocabulary
+
+
+_path = DEFAULT_VOCABULARY
+_cache_folder = None
+_url = None
+_prefixes = None
+_vocabulary = None
+
+
+def configure(path=None, cache_folder=None, url=None, prefixes=None):
+    """Set the vocabulary to use, it is only loaded on first access.
+
+    ``url`` replaces the base URL of the vocabulary types and ``prefixes``
+    maps the prefixes of ``prefix:Type`` itemtypes to their vocabulary URL.
+    """
+    global _path, _cache_folder, _url, _prefixes, _vocabulary
+    _path = path or DEFAULT_VOCABULARY
+    _cache_folder = cache_folder
+    _url = url
+    _prefixes = prefixes
+    _vocabulary = None
+
+
+def get_vocabulary():
+    global _vocabulary
+    if _vocabulary is None:
+        _vocabulary = load(_path, _cache_folder)
+        if _url or _prefixes:
+            _vocabulary = _vocabulary.configured(_url, _prefixes)
+    return _vocabulary
+
+
+def fingerprint():
+    """Identify the configured vocabulary file, its version and URLs."""
+    return repr((stat_key(_path), _url, sorted((_prefixes or {}).items())))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from docutils.core import publish_doctree
+
+from microdata import assets
+from microdata.assets import AssetProber, check_assets, document_assets, local_path
+from microdata.index import RecordStore
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+SITE_URL = 'http://example.com/'
+
+
+class DocumentAssetsTestCase(BaseTestCase):
+
+    def test_assets(self):
+        register()
+        doctree = publish_doctree('.. itemscope:: Recipe\n\n'
+                                  '    :itemprop:`Pie <photo|/images/pie.png|img>`\n\n'
+                                  '    :itemprop:`Home <url|/index.html>` :itemprop:`Pie <name>`\n')
+        self.assertEqual(document_assets(doctree), [
+            {'name': 'photo', 'tag': 'img', 'url': '/images/pie.png', 'line': 3},
+            {'name': 'url', 'tag': 'a', 'url': '/index.html', 'line': 5},
+        ])
+
+    def test_local_path(self):
+        post = 'http://example.com/posts/pie/'
+        self.assertEqual(local_path('/images/pie.png', post, SITE_URL, 'output'),
+                         os.path.join('output', 'images', 'pie.png'))
+        self.assertEqual(local_path('photo%20one.png', post, SITE_URL, 'output'),
+                         os.path.join('output', 'posts', 'pie', 'photo one.png'))
+        self.assertEqual(local_path('../', post, SITE_URL, 'output'),
+                         os.path.join('output', 'posts', 'index.html'))
+        self.assertIsNone(local_path('http://other.org/pie.png', post, SITE_URL, 'output'))
+
+
+@unittest.skipIf(assets.Image is None, 'Pillow is not installed')
+class CheckAssetsTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.output = os.path.join(self.folder, 'output')
+        os.makedirs(os.path.join(self.output, 'images'))
+        assets.Image.new('RGB', (40, 30)).save(os.path.join(self.output, 'images', 'pie.png'))
+        with io.open(os.path.join(self.output, 'images', 'broken.png'), 'wb') as f:
+            f.write(b'not an image')
+        self.source = os.path.join(self.folder, 'pie.rst')
+        with io.open(self.source, 'w', encoding='utf8') as f:
+            f.write('pie')
+        self.store = RecordStore(os.path.join(self.folder, 'assets'))
+        self.store.write(self.source, {'assets': [
+            {'name': 'photo', 'tag': 'img', 'url': '/images/pie.png', 'line': 3},
+            {'name': 'photo', 'tag': 'img', 'url': '/images/broken.png', 'line': 4},
+            {'name': 'url', 'tag': 'a', 'url': 'missing/', 'line': 5},
+            {'name': 'url', 'tag': 'a', 'url': 'http://other.org/', 'line': 6},
+        ]})
+        self.prober = AssetProber(os.path.join(self.folder, 'probes.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def check(self):
+        return check_assets(self.store.folder, self.prober, {self.source: 'http://example.com/posts/pie/'},
+                            SITE_URL, self.output)
+
+    def test_check(self):
+        self.assertEqual(self.check(), [
+            (self.source, 4, 'Unreadable image of photo: /images/broken.png'),
+            (self.source, 5, 'Missing link of url: missing/'),
+        ])
+
+    def test_cached_probes(self):
+        self.check()
+        self.prober.save()
+        self.prober = AssetProber(self.prober.path)
+        calls = []
+        readable_image, assets.readable_image = assets.readable_image, lambda path: calls.append(path)
+        try:
+            problems = self.check()
+        finally:
+            assets.readable_image = readable_image
+        self.assertEqual(calls, [])
+        self.assertEqual(len(problems), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import shutil
+import tempfile
+import unittest
+
+from docutils.utils import DependencyList
+
+from microdata import extract
+from microdata.blocks import batch, splice, split_blocks, unbatch
+from microdata.cache import DiskCache
+from microdata.microdata import cached_rst2html
+from microdata.render import render
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+PAGE = """Catalog
+=======
+
+Our *products*.
+
+.. itemscope:: Product
+    :class: product
+
+    :itemprop:`Widget <name>`
+
+    .. itemscope:: Offer
+        :itemprop: offers
+
+        :itemprop:`9.99 <price>`
+
+Between products.
+
+.. itemscope:: Product
+
+    :itemprop:`Gadget <name>` from `the shop`_
+
+.. _the shop: http://example.com
+
+Accessories
+-----------
+
+.. itemscope:: Product
+
+    :itemprop:`Thing <name>`
+"""
+
+
+class SplitBlocksTestCase(BaseTestCase):
+
+    def test_split(self):
+        skeleton, blocks = split_blocks(PAGE)
+        # The block using a reference stays in the skeleton
+        self.assertEqual(len(blocks), 2)
+        self.assertTrue(blocks[0].startswith('.. itemscope:: Product\n    :class: product\n'))
+        self.assertTrue(blocks[0].endswith(':itemprop:`9.99 <price>`\n'))
+        self.assertIn('.. microdata-block-0\n\nBetween products.', skeleton)
+        self.assertIn('`the shop`_', skeleton)
+        self.assertTrue(skeleton.endswith('-----------\n\n.. microdata-block-1\n'))
+
+    def test_document_directive(self):
+        self.assertEqual(split_blocks('.. default-role:: math\n\n' + PAGE)[1], [])
+
+    def test_splice(self):
+        html = '<p>a</p>\n<!-- microdata-block-0 -->\n<p>b</p>\n<!-- microdata-block-1 -->\n'
+        self.assertEqual(splice(html, ['<div>0</div>', '<div>1</div>']), '<p>a</p>\n<div>0</div><p>b</p>\n<div>1</div>')
+        self.assertIsNone(splice(html, ['<div>0</div>']))
+
+
+class RenderBlocksTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+        self.folder = tempfile.mkdtemp()
+        self.calls = []
+        self.consumers = extract.consumers[:]
+        del extract.consumers[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        extract.consumers[:] = self.consumers
+
+    def rst2html(self, source, **kwargs):
+        self.calls.append(source)
+        return render(source)[0], 1, DependencyList(), None
+
+    def test_same_output(self):
+        cached = cached_rst2html(self.rst2html, DiskCache(self.folder), blocks=True)
+        self.assertEqual(cached(PAGE, settings_overrides={})[0], render(PAGE)[0])
+        # The skeleton and a batch of the blocks
+        self.assertEqual(len(self.calls), 2)
+
+    def test_changed_block(self):
+        cached = cached_rst2html(self.rst2html, DiskCache(self.folder), blocks=True)
+        cached(PAGE, settings_overrides={})
+        del self.calls[:]
+        page = PAGE.replace('9.99', '8.99')
+        self.assertEqual(cached(page, settings_overrides={})[0], render(page)[0])
+        self.assertEqual(len(self.calls), 1)
+        self.assertIn('8.99', self.calls[0])
+
+    def test_batch(self):
+        blocks = split_blocks(PAGE)[1]
+        outputs = unbatch(render(batch(blocks))[0], 2)
+        self.assertEqual(outputs, [render(block)[0] for block in blocks])
+        self.assertIsNone(unbatch('<div>0</div>\n', 1))
+
+    def test_with_consumers(self):
+        extract.consumers.append(lambda document, items: None)
+        cached = cached_rst2html(self.rst2html, DiskCache(self.folder), blocks=True)
+        cached(PAGE, settings_overrides={})
+        self.assertEqual(self.calls, [PAGE])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from docutils.utils import DependencyList
+
+from microdata import cache
+from microdata.cache import DiskCache, SharedCache, memoized
+from microdata.microdata import cached_rst2html, deferred_rst2html, shared_cache
+from .test_base import BaseTestCase
+
+
+class DiskCacheTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = DiskCache(self.folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_roundtrip(self):
+        key = DiskCache.key('some', 'parts')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, {'output': '<p>été</p>'})
+        self.assertEqual(self.cache.get(key), {'output': '<p>été</p>'})
+
+    def test_key(self):
+        self.assertEqual(DiskCache.key('a', 'b'), DiskCache.key('a', 'b'))
+        self.assertNotEqual(DiskCache.key('a', 'b'), DiskCache.key('ab'))
+
+    def test_existing_folder(self):
+        key = DiskCache.key('some', 'parts')
+        # Created by another process since
+        os.makedirs(os.path.dirname(self.cache.path(key)))
+        self.cache.set(key, 'value')
+        self.assertEqual(self.cache.get(key), 'value')
+        self.assertRaises(OSError, cache.make_folder, os.path.join(self.cache.path(key), 'folder'))
+
+
+class SharedCacheTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'shared.cache')
+
+    def tearDown(self):
+        cache.shared = None
+        shutil.rmtree(self.folder)
+
+    def test_roundtrip(self):
+        shared = SharedCache(self.path, 64 * 1024)
+        self.assertIsNone(shared.get(b'key'))
+        shared.set(b'key', ('<p itemprop="name">', '</p>'))
+        self.assertEqual(shared.get(b'key'), ('<p itemprop="name">', '</p>'))
+        self.assertEqual((shared.hits, shared.misses, len(shared)), (1, 1, 1))
+
+    def test_other_process(self):
+        SharedCache(self.path, 64 * 1024).set(b'key', ('été', 1))
+        self.assertEqual(SharedCache(self.path, 64 * 1024).get(b'key'), ('été', 1))
+
+    def test_oversize(self):
+        shared = SharedCache(self.path, 64 * 1024)
+        shared.set(b'key', 'x' * SharedCache.SLOT_SIZE)
+        self.assertIsNone(shared.get(b'key'))
+
+    def test_eviction(self):
+        shared = SharedCache(self.path, 2 * SharedCache.SLOT_SIZE)
+        for i in range(3):
+            shared.set(('key%d' % i).encode('ascii'), i)
+        values = [shared.get(('key%d' % i).encode('ascii')) for i in range(3)]
+        self.assertEqual(len(shared), 2)
+        self.assertEqual(values.count(None), 1)
+        self.assertEqual(values[2], 2)
+
+    def test_corrupted(self):
+        shared = SharedCache(self.path, 64 * 1024)
+        shared.set(b'key', 'value')
+        offset = shared.offsets(b'key')[1][0] + SharedCache.HEADER.size
+        shared.map[offset:offset + 1] = b'\xff'
+        self.assertIsNone(shared.get(b'key'))
+
+    def test_memoized(self):
+        calls = []
+
+        @memoized(16, share=lambda text, other: text)
+        def upper(text, other):
+            calls.append(text)
+            return text.upper()
+
+        cache.shared = SharedCache(self.path, 64 * 1024)
+        self.assertEqual(upper('a', 1), 'A')
+        upper.cache.clear()
+        self.assertEqual(upper('a', 2), 'A')
+        self.assertEqual(calls, ['a'])
+
+    def test_stale_files(self):
+        folder = os.path.join(self.folder, 'shared')
+        os.makedirs(folder)
+        open(os.path.join(folder, 'old.cache'), 'w').close()
+        self.assertIsNone(shared_cache(False, self.folder))
+        shared = shared_cache(64 * 1024, self.folder)
+        self.assertEqual(os.listdir(folder), [os.path.basename(shared.path)])
+        shared.close()
+
+
+class CachedRst2HtmlTestCase(BaseTestCase):
+
+    settings = {'initial_header_level': 1}
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def rst2html(self, source, source_path=None, settings_overrides=None, logger=None, l_add_ln=0,
+                 transforms=None, no_title_transform=False):
+        # Same signature and results as Nikola 8, the document tree comes last
+        self.calls.append(source)
+        error_level = 2 if 'warning' in source else 1
+        return '<p>%s</p>' % source, error_level, DependencyList(), {'title': source}
+
+    def test_cache_hit(self):
+        render = cached_rst2html(self.rst2html, DiskCache(self.folder))
+        source = ':itemprop:`Test <name>`'
+        first = render(source, settings_overrides=self.settings)
+        second = render(source, settings_overrides=self.settings)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(first[:2], second[:2])
+        self.assertEqual(second[2].list, [])
+        self.assertEqual(len(second), 4)
+
+    def test_metadata_read(self):
+        render = cached_rst2html(self.rst2html, DiskCache(self.folder))
+        source = ':itemprop:`Test <name>`'
+        render(source, settings_overrides=self.settings)
+        result = render(source, source_path='post.rst')
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(result[3], {'title': source})
+
+    def test_settings_change(self):
+        render = cached_rst2html(self.rst2html, DiskCache(self.folder))
+        source = ':itemprop:`Test <name>`'
+        render(source, settings_overrides={'initial_header_level': 1})
+        render(source, settings_overrides={'initial_header_level': 2})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_transforms_change(self):
+        class RemoveDocinfo(object):
+            pass
+        render = cached_rst2html(self.rst2html, DiskCache(self.folder))
+        source = ':itemprop:`Test <name>`'
+        render(source, settings_overrides=self.settings, transforms=[])
+        render(source, settings_overrides=self.settings, transforms=[RemoveDocinfo])
+        render(source, settings_overrides=self.settings, transforms=[RemoveDocinfo])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_arguments_change(self):
+        render = cached_rst2html(self.rst2html, DiskCache(self.folder))
+        source = ':itemprop:`Test <name>`'
+        render(source, settings_overrides=self.settings, logger=1)
+        render(source, settings_overrides=self.settings, logger=2)
+        render(source, settings_overrides=self.settings, no_title_transform=True)
+        render(source, settings_overrides=self.settings, l_add_ln=2)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_skip_without_microdata(self):
+        render = cached_rst2html(self.rst2html, DiskCache(self.folder))
+        render('Plain text', settings_overrides=self.settings)
+        render('Plain text', settings_overrides=self.settings)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_recorded_dependencies(self):
+        def rst2html(source, **kwargs):
+            self.calls.append(source)
+            return '<p>%s</p>' % source, 1, DependencyList(None, ['/deps/types/Recipe.json',
+                                                                  '####MAGIC####CONFIG:MICRODATA_JSONLD']), None
+        render = cached_rst2html(rst2html, DiskCache(self.folder), dependencies_folder='/deps')
+        render(':itemprop:`Test <name>`', settings_overrides=self.settings)
+        result = render(':itemprop:`Test <name>`', settings_overrides=self.settings)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(result[2].list, ['/deps/types/Recipe.json', '####MAGIC####CONFIG:MICRODATA_JSONLD'])
+
+    def test_skip_warnings(self):
+        render = cached_rst2html(self.rst2html, DiskCache(self.folder))
+        render(':itemprop:`warning <name>`', settings_overrides=self.settings)
+        render(':itemprop:`warning <name>`', settings_overrides=self.settings)
+        self.assertEqual(len(self.calls), 2)
+
+
+class DeferredRst2HtmlTestCase(BaseTestCase):
+
+    def test_setup_once(self):
+        calls = []
+        render = deferred_rst2html(lambda source: calls.append(source), calls.append, 'setup')
+        self.assertEqual(calls, [])
+        render('first')
+        render('second')
+        self.assertEqual(calls, ['setup', 'first', 'second'])
+
+    def test_uncached(self):
+        def rst2html(source):
+            return source
+        cached = cached_rst2html(rst2html, DiskCache(tempfile.gettempdir()))
+        self.assertIs(deferred_rst2html(cached, id).uncached, rst2html)
+
+
+if __name__ == "__main__":
+    unittest.main()
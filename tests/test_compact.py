@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import unittest
+
+from microdata import rst
+from microdata.render import render
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+RECIPE = """.. itemscope:: Recipe
+
+    :itemprop:`Apple Pie <name>`
+
+    By :itemprop:`Grandma <author>`, :itemprop:`1h <totalTime|PT1H|meta>`
+
+    .. itempropblock:: instructions
+
+        Bake *slowly*.
+
+    .. itempropblock:: summary
+        :tag: section
+
+        Simple.
+"""
+
+
+class CompactOutputTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+        rst.compact_output = True
+
+    def tearDown(self):
+        rst.compact_output = False
+
+    def test_compact(self):
+        fragment, items = render(RECIPE)
+        self.assertIn('<div itemscope itemtype="http://data-vocabulary.org/Recipe">', fragment)
+        self.assertIn('<p itemprop="name">Apple Pie</p>', fragment)
+        self.assertIn('<p itemprop="instructions">Bake <em>slowly</em>.</p>', fragment)
+        # Paragraphs holding other content and explicit tags are kept
+        self.assertIn('<p>By <span itemprop="author">Grandma</span>', fragment)
+        self.assertIn('<section itemprop="summary"><p>Simple.</p>', fragment)
+
+    def test_same_items(self):
+        fragment, items = render(RECIPE)
+        rst.compact_output = False
+        full_fragment, full_items = render(RECIPE)
+        self.assertEqual(items, full_items)
+        self.assertLess(len(fragment), len(full_fragment))
+
+    def test_list_attributes(self):
+        fragment, _ = render('.. _jane:\n\n.. itemscope:: Person\n\n    :itemprop:`Jane <name>`\n')
+        self.assertIn('itemscope itemtype=', fragment)
+        self.assertNotIn('itemscope="itemscope"', fragment)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import unittest
+
+from microdata.cache import LRUCache
+from microdata.core import html_tags, parse_role, prop_tags
+from .test_base import BaseTestCase
+
+
+class ParseRoleTestCase(BaseTestCase):
+
+    def test_name_only(self):
+        self.assertEqual(parse_role('<name>'), ('', 'name', '', ''))
+
+    def test_value_and_name(self):
+        self.assertEqual(parse_role('John Doe <name>'), ('John Doe', 'name', '', ''))
+
+    def test_info_and_tag(self):
+        self.assertEqual(parse_role('30 min <prepTime|PT30M|time>'),
+                         ('30 min', 'prepTime', 'PT30M', 'time'))
+
+    def test_deprecated_colon(self):
+        self.assertEqual(parse_role('Test <url:http://somewhere/>'),
+                         ('Test', 'url', 'http://somewhere/', ''))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, parse_role, 'no name')
+        self.assertRaises(ValueError, parse_role, 'empty <>')
+
+    def test_cached(self):
+        parse_role.cache.clear()
+        first = parse_role('Smithy <nickname>')
+        self.assertIs(parse_role('Smithy <nickname>'), first)
+        self.assertEqual(parse_role.cache.hits, 1)
+        self.assertEqual(parse_role.cache.misses, 1)
+
+
+class HtmlTagsTestCase(BaseTestCase):
+
+    def test_sorted_and_escaped(self):
+        self.assertEqual(html_tags('div', (('itemtype', 'http://x/?a&b'), ('class', 'a "b"'))),
+                         ('<div class="a &quot;b&quot;" itemtype="http://x/?a&amp;b">', '</div>'))
+
+    def test_empty(self):
+        self.assertEqual(html_tags('img', (('src', 'pie.jpg'), ('itemprop', 'photo')), True),
+                         ('<img itemprop="photo" src="pie.jpg" />', ''))
+
+    def test_prop_tags(self):
+        self.assertEqual(prop_tags(parse_role('30 min <prepTime|PT30M|time>')),
+                         ('<time datetime="PT30M" itemprop="prepTime">', '</time>'))
+        self.assertIs(prop_tags(parse_role('<name>')), prop_tags(parse_role('<name>')))
+
+
+class LRUCacheTestCase(BaseTestCase):
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from docutils.core import publish_doctree
+from docutils.utils import DependencyList
+
+from microdata import dependencies
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+SAMPLE = """.. itemscope:: Recipe
+
+    Preparation time: :itemprop:`30 min <prepTime|PT30M|time>`
+    by :itemprop:`Grandma <name>` and :itemprop:`Grandpa <name>`
+"""
+
+
+class DependencyTrackerTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+        self.folder = tempfile.mkdtemp()
+        self.tracker = dependencies.tracker = dependencies.DependencyTracker(self.folder)
+
+    def tearDown(self):
+        dependencies.tracker = None
+        shutil.rmtree(self.folder)
+
+    def publish(self, text):
+        doctree = publish_doctree(text, settings_overrides={'record_dependencies': DependencyList()})
+        return doctree.settings.record_dependencies.list
+
+    def test_record(self):
+        deps = self.publish(SAMPLE)
+        recipe = self.tracker.path('types', 'Recipe')
+        self.assertEqual(sorted(deps), sorted([
+            '####MAGIC####CONFIG:MICRODATA_JSONLD',
+            '####MAGIC####CONFIG:MICRODATA_VALIDATE',
+            '####MAGIC####CONFIG:MICRODATA_COMPACT_HTML',
+            recipe,
+            self.tracker.path('properties', 'prepTime'),
+            self.tracker.path('properties', 'name'),
+        ]))
+        with io.open(recipe, encoding='utf8') as f:
+            definition = json.load(f)
+        self.assertEqual(definition['url'], 'http://data-vocabulary.org/Recipe')
+        self.assertIn('prepTime', definition['properties'])
+
+    def test_without_microdata(self):
+        self.assertEqual(self.publish('Plain text'), [])
+
+    def test_unchanged(self):
+        self.publish(SAMPLE)
+        path = self.tracker.path('types', 'Recipe')
+        os.utime(path, (1, 1))
+        dependencies.tracker = dependencies.DependencyTracker(self.folder)
+        self.publish(SAMPLE)
+        self.assertEqual(os.path.getmtime(path), 1)
+
+    def test_existing_folder(self):
+        # Created by another worker since
+        os.makedirs(os.path.join(self.folder, 'types'))
+        self.publish(SAMPLE)
+        self.assertEqual(os.listdir(os.path.join(self.folder, 'types')), ['Recipe.json'])
+
+    def test_refresh(self):
+        self.publish(SAMPLE)
+        self.tracker.refresh()
+        path = self.tracker.path('properties', 'name')
+        with io.open(path, 'w', encoding='utf8') as f:
+            f.write('{"name": "name", "tag": "h1"}')
+        tracker = dependencies.DependencyTracker(self.folder)
+        tracker.refresh()
+        # Same vocabulary, nothing to refresh
+        with io.open(path, encoding='utf8') as f:
+            self.assertEqual(json.load(f)['tag'], 'h1')
+        os.unlink(os.path.join(self.folder, 'vocabulary'))
+        tracker.refresh()
+        with io.open(path, encoding='utf8') as f:
+            self.assertEqual(json.load(f), {'name': 'name', 'tag': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import json
+import unittest
+
+import nikola.plugins.compile.rest
+
+from microdata.extract import jsonld
+from .test_base import BaseTestCase
+from .test_rst_compiler import FakeSite, ReSTExtensionTestCase
+
+
+class JsonLdTestCase(BaseTestCase):
+
+    def test_nested(self):
+        item = {
+            'type': 'http://schema.org/Recipe',
+            'properties': {
+                'name': ['Apple Pie'],
+                'ingredients': ['apples', 'sugar'],
+                'author': [{
+                    'type': 'http://schema.org/Person',
+                    'properties': {'name': ['Grandma']},
+                }],
+            },
+        }
+        self.assertEqual(json.loads(json.dumps(jsonld(item))), {
+            '@context': {'@vocab': 'http://schema.org/'},
+            '@type': 'Recipe',
+            'name': 'Apple Pie',
+            'ingredients': ['apples', 'sugar'],
+            'author': {'@type': 'Person', 'name': 'Grandma'},
+        })
+
+
+class InjectJsonLdTestCase(ReSTExtensionTestCase):
+
+    def setUp(self):
+        site = FakeSite()
+        site.config['MICRODATA_JSONLD'] = True
+        self.compiler = nikola.plugins.compile.rest.CompileRest()
+        self.compiler.set_site(site)
+
+    def test_script(self):
+        self.sample = """.. itemscope:: Recipe
+
+            .. itempropblock:: name
+                :tag: h1
+
+                Grandma's Holiday Apple Pie
+
+            Preparation time: :itemprop:`30 min <prepTime|PT30M|time>`
+
+            .. itemscope:: Person
+                :tag: span
+                :itemprop: author
+
+                By :itemprop:`Grandma <name>`
+        """
+        self.basic_test()
+        script = next(self.html_doc.iter('script'))
+        self.assertEqual(script.get('type'), 'application/ld+json')
+        self.assertEqual(json.loads(script.text), {
+            '@context': {'@vocab': 'http://data-vocabulary.org/'},
+            '@type': 'Recipe',
+            'name': "Grandma's Holiday Apple Pie",
+            'prepTime': 'PT30M',
+            'author': {'@type': 'Person', 'name': 'Grandma'},
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from microdata.feeds import Feed
+from microdata.index import RecordStore
+from .test_base import BaseTestCase
+from .test_index import recipe
+
+RECIPE = 'http://data-vocabulary.org/Recipe'
+
+
+class FeedTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = RecordStore(os.path.join(self.folder, 'items'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_post(self, name, *items):
+        source = os.path.join(self.folder, name + '.rst')
+        with io.open(source, 'w', encoding='utf8') as f:
+            f.write(name)
+        self.store({'source': source}, list(items))
+        return source
+
+    def feed(self, name, columns=None):
+        return Feed(os.path.join(self.folder, 'output', name), RECIPE, os.path.join(self.folder, 'feeds'), columns)
+
+    def read(self, feed):
+        with io.open(feed.path, 'r', encoding='utf8', newline='') as f:
+            return f.read()
+
+    def test_jsonl(self):
+        pie = self.write_post('pie', recipe('Apple Pie', 'apples', 'sugar'))
+        self.write_post('cake', recipe('Cake', 'flour'))
+        feed = self.feed('recipes.jsonl')
+        self.assertEqual(feed.update(self.store, {pie: 'http://example.com/pie/'}), (2, 0))
+        lines = [json.loads(line) for line in self.read(feed).splitlines()]
+        self.assertEqual(sorted(line['name'] for line in lines), ['Apple Pie', 'Cake'])
+        pie_line = [line for line in lines if line['name'] == 'Apple Pie'][0]
+        self.assertEqual(pie_line['@id'], 'http://example.com/pie/')
+        self.assertEqual(pie_line['@type'], 'Recipe')
+        self.assertEqual(pie_line['author']['name'], 'Grandma')
+
+    def test_csv(self):
+        self.write_post('pie', recipe('Apple, Pie', 'apples', 'sugar'))
+        feed = self.feed('recipes.csv', ['name', 'ingredient'])
+        feed.update(self.store)
+        self.assertEqual(self.read(feed), '@id,name,ingredient\r\n,"Apple, Pie",apples; sugar\r\n')
+
+    def test_nested_items(self):
+        self.write_post('menu', {
+            'type': 'http://data-vocabulary.org/Menu',
+            'properties': {'dish': [recipe('Soup', 'leeks'), recipe('Stew', 'beef')]},
+        })
+        feed = self.feed('recipes.jsonl')
+        feed.update(self.store)
+        names = [json.loads(line)['name'] for line in self.read(feed).splitlines()]
+        self.assertEqual(names, ['Soup', 'Stew'])
+
+    def test_incremental(self):
+        self.write_post('pie', recipe('Apple Pie', 'apples'))
+        cake = self.write_post('cake', recipe('Cake', 'flour'))
+        feed = self.feed('recipes.jsonl')
+        self.assertEqual(feed.update(self.store), (2, 0))
+        mtime = os.path.getmtime(feed.path)
+        self.assertEqual(feed.update(self.store), (0, 0))
+        self.assertEqual(os.path.getmtime(feed.path), mtime)
+        time.sleep(0.01)
+        self.store({'source': cake}, [recipe('Cake', 'eggs')])
+        self.assertEqual(feed.update(self.store), (1, 0))
+        self.assertIn('eggs', self.read(feed))
+        self.assertNotIn('flour', self.read(feed))
+
+    def test_removed_source(self):
+        pie = self.write_post('pie', recipe('Apple Pie', 'apples'))
+        self.write_post('cake', recipe('Cake', 'flour'))
+        feed = self.feed('recipes.csv', ['name'])
+        feed.update(self.store)
+        os.remove(pie)
+        self.assertEqual(feed.update(self.store), (0, 1))
+        self.assertEqual(self.read(feed), '@id,name\r\n,Cake\r\n')
+
+    def test_columns_change(self):
+        self.write_post('pie', recipe('Apple Pie', 'apples'))
+        feed = self.feed('recipes.csv', ['name'])
+        feed.update(self.store)
+        feed = self.feed('recipes.csv', ['name', 'ingredient'])
+        self.assertEqual(feed.update(self.store), (1, 0))
+        self.assertEqual(self.read(feed), '@id,name,ingredient\r\n,Apple Pie,apples\r\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from docutils.utils import new_document
+
+from microdata.index import MicrodataIndex, RecordStore
+from .test_base import BaseTestCase
+
+
+def recipe(name, *ingredients):
+    return {
+        'type': 'http://data-vocabulary.org/Recipe',
+        'anchor': None,
+        'line': 1,
+        'properties': {
+            'name': [name],
+            'ingredient': list(ingredients),
+            'author': [{
+                'type': 'http://data-vocabulary.org/Person',
+                'properties': {'name': ['Grandma']},
+            }],
+        },
+    }
+
+
+class MicrodataIndexTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = RecordStore(os.path.join(self.folder, 'items'))
+        self.index = MicrodataIndex(os.path.join(self.folder, 'index.sqlite'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.folder)
+
+    def write_post(self, name, *items):
+        source = os.path.join(self.folder, name + '.rst')
+        with io.open(source, 'w', encoding='utf8') as f:
+            f.write(name)
+        self.store({'source': source}, list(items))
+        return source
+
+    def test_query(self):
+        pie = self.write_post('pie', recipe('Apple Pie', 'apples', 'sugar'))
+        self.write_post('cake', recipe('Cake', 'flour', 'sugar'))
+        self.assertEqual(self.index.update(self.store), (2, 0))
+        items = list(self.index.items(itemtype='http://data-vocabulary.org/Recipe'))
+        self.assertEqual(len(items), 2)
+        items = list(self.index.items(name='ingredient', value='apples'))
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]['source'], pie)
+        self.assertEqual(items[0]['properties']['ingredient'], ['apples', 'sugar'])
+        self.assertEqual(len(list(self.index.items(name='ingredient', value='sugar'))), 2)
+
+    def test_incremental(self):
+        self.write_post('pie', recipe('Apple Pie', 'apples'))
+        cake = self.write_post('cake', recipe('Cake', 'flour'))
+        self.assertEqual(self.index.update(self.store), (2, 0))
+        self.assertEqual(self.index.update(self.store), (0, 0))
+        time.sleep(0.01)
+        self.store({'source': cake}, [recipe('Cake', 'eggs')])
+        self.assertEqual(self.index.update(self.store), (1, 0))
+        self.assertEqual(len(list(self.index.items(name='ingredient', value='eggs'))), 1)
+        self.assertEqual(len(list(self.index.items(name='ingredient', value='flour'))), 0)
+
+    def test_removed_source(self):
+        pie = self.write_post('pie', recipe('Apple Pie', 'apples'))
+        self.index.update(self.store)
+        os.remove(pie)
+        self.assertEqual(self.index.update(self.store), (0, 1))
+        self.assertEqual(list(self.index.items()), [])
+
+    def test_nikola_source(self):
+        # Nikola renders the text of the post, its path is in the settings
+        source = os.path.join(self.folder, 'pie.rst')
+        with io.open(source, 'w', encoding='utf8') as f:
+            f.write('pie')
+        document = new_document('<string>')
+        document.settings._nikola_source_path = source
+        self.store(document, [recipe('Apple Pie', 'apples')])
+        self.assertEqual(self.index.update(self.store), (1, 0))
+        self.assertEqual(next(self.index.items())['source'], source)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import unittest
+
+from microdata.isodate import normalize, to_iso_date, to_iso_duration
+from .test_base import BaseTestCase
+
+
+class IsoDurationTestCase(BaseTestCase):
+
+    def test_durations(self):
+        self.assertEqual(to_iso_duration('30 min'), 'PT30M')
+        self.assertEqual(to_iso_duration('1 hr 15 min'), 'PT1H15M')
+        self.assertEqual(to_iso_duration('1 hour and 15 minutes'), 'PT1H15M')
+        self.assertEqual(to_iso_duration('2 days, 3 hours'), 'P2DT3H')
+        self.assertEqual(to_iso_duration('1.5 hours'), 'PT1.5H')
+
+    def test_iso(self):
+        self.assertEqual(to_iso_duration('PT30M'), 'PT30M')
+
+    def test_invalid(self):
+        self.assertIsNone(to_iso_duration('30'))
+        self.assertIsNone(to_iso_duration('30 apples'))
+        self.assertIsNone(to_iso_duration('1 hr 1 hr'))
+        self.assertIsNone(to_iso_duration('P'))
+
+
+class IsoDateTestCase(BaseTestCase):
+
+    def test_dates(self):
+        self.assertEqual(to_iso_date('May 8, 2009'), '2009-05-08')
+        self.assertEqual(to_iso_date('8 May 2009'), '2009-05-08')
+        self.assertEqual(to_iso_date('Sept. 3rd, 2014'), '2014-09-03')
+
+    def test_iso(self):
+        self.assertEqual(to_iso_date('2009-05-08'), '2009-05-08')
+        self.assertEqual(to_iso_date('2009-05-08T10:00'), '2009-05-08T10:00')
+
+    def test_invalid(self):
+        self.assertIsNone(to_iso_date('Feb 30, 2009'))
+        self.assertIsNone(to_iso_date('Someday 8, 2009'))
+
+    def test_normalize_cached(self):
+        normalize.cache.clear()
+        normalize('45 min')
+        normalize('45 min')
+        self.assertEqual(normalize.cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import importlib
+import sys
+import unittest
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+from microdata import mdx_microdata
+from microdata.mdx_microdata import MicrodataExtension
+from microdata.render import render
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+SAMPLE = """.. itemscope:: Recipe
+    :class: recipe
+
+    .. itempropblock:: name
+        :tag: h1
+
+        Grandma's Holiday Apple Pie
+
+    Preparation time: :itemprop:`30 min <prepTime|PT30M|time>`
+
+    .. itemscope:: Person
+        :tag: span
+        :itemprop: author
+        :compact:
+
+        By :itemprop:`Grandma <name>`
+"""
+
+
+@unittest.skipIf(markdown is None, 'Markdown is not installed')
+class MicrodataExtensionTestCase(BaseTestCase):
+
+    def convert(self, text):
+        return markdown.markdown(text, extensions=[MicrodataExtension()], output_format='xhtml')
+
+    def test_itemprop(self):
+        self.assertEqual(self.convert('Made by :itemprop:`*Grandma* <name>`'),
+                         '<p>Made by <span itemprop="name">*Grandma*</span></p>')
+
+    def test_invalid_itemprop(self):
+        self.assertEqual(self.convert('Made by :itemprop:`me <name>` and :itemprop:`Grandma`'),
+                         '<p>Made by <span itemprop="name">me</span> and :itemprop:`Grandma`</p>')
+
+    def test_itemscope(self):
+        html = self.convert(SAMPLE + '\nAfter the recipe.\n')
+        self.assertIn('<div class="recipe" itemscope="itemscope" itemtype="http://data-vocabulary.org/Recipe">',
+                      html)
+        self.assertIn('<h1 itemprop="name">', html)
+        self.assertIn('<time datetime="PT30M" itemprop="prepTime">30 min</time>', html)
+        self.assertIn('<span itemprop="author" itemscope="itemscope" itemtype="http://data-vocabulary.org/Person">'
+                      'By <span itemprop="name">Grandma</span></span></div>', html)
+        self.assertTrue(html.endswith('<p>After the recipe.</p>'))
+
+    def test_same_as_rst(self):
+        register()
+        for role in (':itemprop:`30 min <prepTime|PT30M|time>`', ':itemprop:`<photo|pie.jpg|img>`',
+                     ':itemprop:`May 8, 2009 <datePublished||meta>`', ':itemprop:`Grandma <name>`'):
+            fragment, _ = render(role)
+            self.assertEqual(self.convert(role), fragment.strip())
+
+
+class ImportTestCase(BaseTestCase):
+
+    def test_without_nikola(self):
+        # A None entry makes the import fail, as if Nikola was not installed
+        modules = {name: None for name in ('nikola', 'nikola.plugin_categories', 'microdata.mdx_microdata')}
+        saved = {name: sys.modules.get(name) for name in modules}
+        sys.modules.update(modules)
+        try:
+            del sys.modules['microdata.mdx_microdata']
+            module = importlib.import_module('microdata.mdx_microdata')
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    del sys.modules[name]
+                else:
+                    sys.modules[name] = value
+            # The import also set the attribute of the package
+            sys.modules['microdata'].mdx_microdata = mdx_microdata
+        self.assertIsNot(module, mdx_microdata)
+        self.assertTrue(issubclass(module.MicrodataExtension, module.MarkdownExtension))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -55,6 +55,15 @@ class ItemPropTestCase(ReSTExtensionTestCase):
                                 text="30 min")
         self.assertHTMLContains("p")
 
+    def test_itemprop_time_convert(self):
+        # the result should be
+        # <time datetime="PT1H15M" itemprop="prepTime">1 hr 15 min</time>
+        self.sample = ":itemprop:`1 hr 15 min <prepTime||time>` :itemprop:`1 hr 15 min <cookTime>`"
+        self.basic_test()
+        self.assertHTMLContains("time", attributes={"itemprop": "prepTime", "datetime": "PT1H15M"},
+                                text="1 hr 15 min")
+        self.assertIn('<time datetime="PT1H15M" itemprop="cookTime">1 hr 15 min</time>', self.html)
+
     def test_itemprop_meta(self):
         # the result should be
         # <meta itemprop="datePublished" content="2009-05-08">May 8, 2009
@@ -70,6 +79,14 @@ class ItemPropTestCase(ReSTExtensionTestCase):
         self.assertHTMLContains("p")
         self.assertHTMLEqual(expected.strip())
 
+    def test_itemprop_meta_convert(self):
+        # the result should be
+        # <meta content="2009-05-08" itemprop="datePublished" />
+        self.sample = ":itemprop:`<datePublished|May 8, 2009|meta>` May 8, 2009"
+        self.basic_test()
+        self.assertHTMLContains("meta", attributes={"itemprop": "datePublished", "content": "2009-05-08"},
+                                text="")
+
 
 class ItemPropUrlTestCase(ReSTExtensionTestCase):
 
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import sys
+import unittest
+
+from docutils.parsers.rst import states
+
+from microdata.extract import jsonld
+from microdata.render import render
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+
+def catalog(products):
+    """A page of ``products`` itemscopes, each one with a nested offer."""
+    lines = []
+    for i in range(products):
+        lines.extend([
+            '.. itemscope:: Product',
+            '',
+            '    :itemprop:`Product %d <name>`' % i,
+            '',
+            '    .. itemscope:: Offer',
+            '        :itemprop: offers',
+            '',
+            '        :itemprop:`%d.99 <price>`' % i,
+            '',
+        ])
+    return '\n'.join(lines)
+
+
+def chain(depth):
+    """``depth`` itemscopes, each one nested in the previous one."""
+    lines = []
+    for level in range(depth):
+        indent = '    ' * level
+        lines.append(indent + '.. itemscope:: Thing')
+        if level:
+            lines.append(indent + '    :itemprop: part')
+        lines.extend(['', indent + '    :itemprop:`Level %d <name>`' % level, ''])
+    return '\n'.join(lines)
+
+
+class NestingTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+        self.recursion_limit = sys.getrecursionlimit()
+
+    def tearDown(self):
+        sys.setrecursionlimit(self.recursion_limit)
+
+    def test_wide(self):
+        fragment, items = render(catalog(5000))
+        self.assertEqual(fragment.count('itemscope="itemscope"'), 10000)
+        self.assertEqual(len(items), 5000)
+        self.assertEqual(items[-1]['properties']['name'], ['Product 4999'])
+        self.assertEqual(items[-1]['properties']['offers'][0]['properties']['price'], ['4999.99'])
+
+    def test_deep(self):
+        depth = 200
+        fragment, items = render(chain(depth))
+        self.assertEqual(fragment.count('itemscope="itemscope"'), depth)
+        self.assertEqual(fragment.count('</div>'), depth)
+        item, level = items[0], 0
+        while 'part' in item['properties']:
+            item, level = item['properties']['part'][0], level + 1
+        self.assertEqual(level, depth - 1)
+        self.assertEqual(item['properties']['name'], ['Level %d' % (depth - 1)])
+        self.assertEqual(jsonld(items[0])['name'], 'Level 0')
+        # The limit is only raised while parsing
+        self.assertEqual(sys.getrecursionlimit(), self.recursion_limit)
+
+
+class OptionsTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+
+    def test_simple(self):
+        fragment, _ = render('.. itemscope:: Person\n    :tag: span\n    :class: a b\n    :compact:\n\n    Bob\n')
+        self.assertIn('<span class="a b" itemscope="itemscope"', fragment)
+
+    def test_docutils_fallback(self):
+        fragment, _ = render('.. itemscope:: Person\n    :class: a.b\n\n    Bob\n')
+        self.assertIn('<div class="a.b" itemscope="itemscope"', fragment)
+        fragment, _ = render('.. itemscope:: Person\n    :unknown: a\n\n    Bob\n',
+                             settings_overrides={'report_level': 3})
+        self.assertIn('unknown option: &quot;unknown&quot;', fragment)
+
+    def test_arguments(self):
+        fragment, _ = render('.. itemscope::\n    :tag: span\n\n    Bob\n', settings_overrides={'report_level': 3})
+        self.assertIn('1 argument(s) required, 0 supplied', fragment)
+        fragment, _ = render('.. itemscope:: Person Place\n\n    Bob\n', settings_overrides={'report_level': 3})
+        self.assertIn('maximum 1 argument(s) allowed, 2 supplied', fragment)
+
+    def test_other_directives(self):
+        # Only the plugin directives parse their options themselves
+        self.assertEqual(states.Body.parse_extension_options.__module__, states.__name__)
+        fragment, _ = render('.. image:: pie.png\n    :alt: Pie\n')
+        self.assertIn('alt="Pie"', fragment)
+
+
+if __name__ == '__main__':
+    unittest.main()
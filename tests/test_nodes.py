@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import unittest
+
+from docutils.core import publish_doctree
+
+from microdata.rst import ItemProp, ItemScope, register
+from .test_base import BaseTestCase
+
+SAMPLE = """.. itemscope:: Recipe
+    :class: recipe
+
+    .. itempropblock:: name
+        :tag: h1
+
+        Apple Pie
+
+    :itemprop:`30 min <prepTime|PT30M|time>` and :itemprop:`30 min <prepTime|PT30M|time>`
+
+    .. itemscope:: Person
+        :tag: span
+        :itemprop: author
+
+        :itemprop:`Grandma <name>`
+"""
+
+
+class NodesTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+        self.doctree = publish_doctree(SAMPLE, settings_overrides={'report_level': 5})
+
+    def test_shared_data(self):
+        props = [node for node in self.doctree.traverse(ItemProp)]
+        self.assertIs(props[0].prop, props[1].prop)
+        scopes = [node for node in self.doctree.traverse(ItemScope)]
+        other = publish_doctree(SAMPLE, settings_overrides={'report_level': 5})
+        self.assertIs(scopes[0]['itemtype'], next(iter(other.traverse(ItemScope)))['itemtype'])
+
+    def test_deepcopy(self):
+        copy = self.doctree.deepcopy()
+        self.assertEqual(copy.pformat(), self.doctree.pformat())
+        scope = next(iter(copy.traverse(ItemScope)))
+        self.assertEqual(scope.tagname, 'div')
+        self.assertEqual(scope['class'], 'recipe')
+        self.assertFalse(scope.compact)
+        self.assertEqual(next(iter(copy.traverse(ItemProp))).prop.info, 'PT30M')
+
+
+if __name__ == "__main__":
+    unittest.main()
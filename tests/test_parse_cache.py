@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import unittest
+
+from microdata import rst
+from microdata.cache import LRUCache
+from microdata.render import render
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+CARD = """.. itemscope:: Person
+    :class: author
+
+    Written by :itemprop:`Jane Doe <name>`, :itemprop:`chef <title>`.
+
+    .. itempropblock:: address
+
+        *Paris*, France
+"""
+
+
+class ParseCacheTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+        rst.parse_cache = LRUCache(16)
+
+    def tearDown(self):
+        rst.parse_cache = None
+
+    def uncached(self, text):
+        cache, rst.parse_cache = rst.parse_cache, None
+        try:
+            return render(text)
+        finally:
+            rst.parse_cache = cache
+
+    def test_identical_blocks(self):
+        text = '\n'.join([CARD] * 3)
+        fragment, items = render(text)
+        self.assertEqual((fragment, items), self.uncached(text))
+        # The itempropblock and itemscope contents are parsed once
+        self.assertEqual(rst.parse_cache.misses, 2)
+        self.assertEqual(rst.parse_cache.hits, 2)
+        self.assertEqual([item['line'] for item in items], [1, 10, 19])
+
+    def test_copies(self):
+        render(CARD)
+        first, _ = render(CARD)
+        self.assertEqual(rst.parse_cache.hits, 1)
+        second, _ = render(CARD)
+        self.assertEqual(first, second)
+
+    def test_options_in_key(self):
+        render(CARD)
+        fragment, _ = render(CARD.replace(':class: author', ':class: editor'))
+        self.assertIn('class="editor"', fragment)
+        # Only the unchanged itempropblock is reused
+        self.assertEqual(rst.parse_cache.hits, 1)
+        self.assertEqual(rst.parse_cache.misses, 3)
+
+    def test_not_cached(self):
+        text = ('.. itemscope:: Person\n\n    :itemprop:`Jane <name>` see `the site`_\n\n'
+                '.. _the site: http://example.com\n')
+        render(text)
+        render(text)
+        self.assertEqual(rst.parse_cache.hits, 0)
+        self.assertEqual(len(rst.parse_cache), 0)
+        text = '.. itemscope:: Person\n\n    .. note:: Hello\n'
+        render(text)
+        self.assertEqual(len(rst.parse_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
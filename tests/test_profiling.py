@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from microdata.rst import register
+from microdata.profiling import Profiler
+from microdata.render import render
+from .test_base import BaseTestCase
+
+SAMPLE = """.. itemscope:: Recipe
+
+    .. itempropblock:: name
+
+        Apple Pie
+
+    Preparation time: :itemprop:`30 min <prepTime|PT30M|time>`
+"""
+
+
+class ProfilerTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+        register(self.profiler)
+
+    def tearDown(self):
+        register()
+
+    def test_hooks(self):
+        render(SAMPLE, source_path='recipe.rst')
+        report = self.profiler.report()
+        hooks = report['hooks']
+        self.assertEqual(hooks['ItemScopeDirective.run']['calls'], 1)
+        self.assertEqual(hooks['ItemPropDirective.run']['calls'], 1)
+        self.assertEqual(hooks['itemprop_role']['calls'], 1)
+        self.assertEqual(hooks['visit_ItemProp']['calls'], 1)
+        self.assertEqual(hooks['depart_ItemScope']['calls'], 1)
+        scope = hooks['ItemScopeDirective.run']
+        self.assertLess(scope['self_time'], scope['time'])
+
+    def test_posts(self):
+        render(SAMPLE, source_path='recipe.rst')
+        render(SAMPLE + SAMPLE, source_path='recipes.rst')
+        posts = self.profiler.report()['posts']
+        self.assertEqual(set(post['source'] for post in posts), set(['recipe.rst', 'recipes.rst']))
+        calls = dict((post['source'], post['calls']) for post in posts)
+        self.assertEqual(calls['recipes.rst'], 2 * calls['recipe.rst'])
+
+    def test_write(self):
+        render(SAMPLE, source_path='recipe.rst')
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'microdata', 'profile.json')
+            table = self.profiler.write(path, top=1)
+            with io.open(path, encoding='utf8') as f:
+                report = json.load(f)
+            self.assertEqual(report['posts'][0]['source'], 'recipe.rst')
+            self.assertIn('recipe.rst', table)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
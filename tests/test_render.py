@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from microdata.rst import register
+from microdata.render import BatchRenderer, render, render_parallel
+from .test_base import BaseTestCase
+
+SAMPLE = """.. itemscope:: Recipe
+
+    .. itempropblock:: name
+        :tag: h1
+
+        {0}
+
+    Preparation time: :itemprop:`30 min <prepTime|PT30M|time>`
+"""
+
+
+class RenderTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+
+    def test_render(self):
+        fragment, items = render(SAMPLE.format('Apple Pie'))
+        self.assertIn('<h1 itemprop="name">', fragment)
+        self.assertIn('<time datetime="PT30M" itemprop="prepTime">30 min</time>', fragment)
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]['type'], 'http://data-vocabulary.org/Recipe')
+        self.assertEqual(items[0]['properties']['name'], ['Apple Pie'])
+
+
+class BatchRendererTestCase(BaseTestCase):
+
+    def test_render_iter(self):
+        snippets = [SAMPLE.format('Pie %d' % i) for i in range(3)]
+        snippets.append(':itemprop:`Test <name>`')
+        renderer = BatchRenderer()
+        fragments = renderer.render_iter(iter(snippets))
+        self.assertEqual(list(fragments), [render(snippet)[0] for snippet in snippets])
+
+
+class RenderParallelTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(6):
+            path = os.path.join(self.folder, 'post-%d.rst' % i)
+            with io.open(path, 'w', encoding='utf8') as f:
+                f.write(SAMPLE.format('Pie %d' % i))
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_render_parallel(self):
+        results = list(render_parallel(self.paths, processes=2))
+        self.assertEqual([path for path, _, _ in results], self.paths)
+        for i, (_, fragment, items) in enumerate(results):
+            self.assertIn('Pie %d' % i, fragment)
+            self.assertEqual(items[0]['properties']['name'], ['Pie %d' % i])
+
+    @unittest.skipUnless(hasattr(multiprocessing, 'get_start_method'), 'Python 3.4+')
+    def test_spawn_config(self):
+        start_method = multiprocessing.get_start_method(allow_none=True)
+        multiprocessing.set_start_method('spawn', force=True)
+        try:
+            config = {'CACHE_FOLDER': self.folder, 'MICRODATA_VOCABULARY_URL': 'https://schema.org/'}
+            results = list(render_parallel(self.paths[:2], processes=2, config=config))
+        finally:
+            multiprocessing.set_start_method(start_method, force=True)
+        for _, fragment, items in results:
+            self.assertIn('itemtype="https://schema.org/Recipe"', fragment)
+            self.assertEqual(items[0]['type'], 'https://schema.org/Recipe')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from docutils.core import publish_doctree
+
+from microdata.index import RecordStore
+from microdata.rst import register
+from microdata.search import ImageSitemap, SearchIndex, item_words
+from .test_base import BaseTestCase
+from .test_index import recipe
+
+RECIPE = 'http://data-vocabulary.org/Recipe'
+PERSON = 'http://data-vocabulary.org/Person'
+
+
+class SearchTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = RecordStore(os.path.join(self.folder, 'items'))
+        self.urls = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_post(self, name, items, images=()):
+        source = os.path.join(self.folder, name + '.rst')
+        with io.open(source, 'w', encoding='utf8') as f:
+            f.write(name)
+        self.store.write(source, {'items': items, 'images': list(images)})
+        self.urls[source] = 'http://example.com/posts/{0}/'.format(name)
+        return source
+
+    def read(self, output):
+        with io.open(output.path, 'r', encoding='utf8') as f:
+            return f.read()
+
+    def test_sitemap(self):
+        self.write_post('pie', [recipe('Apple Pie', 'apples')], ['pie.jpg', '/images/a&b.png', 'pie.jpg'])
+        self.write_post('cake', [recipe('Cake', 'flour')])
+        sitemap = ImageSitemap(os.path.join(self.folder, 'output', 'sitemap.xml'), self.folder)
+        sitemap.update(self.store, self.urls)
+        self.assertEqual(self.read(sitemap).splitlines()[2:], [
+            '<url><loc>http://example.com/posts/pie/</loc>'
+            '<image:image><image:loc>http://example.com/posts/pie/pie.jpg</image:loc></image:image>'
+            '<image:image><image:loc>http://example.com/images/a&amp;b.png</image:loc></image:image></url>',
+            '</urlset>',
+        ])
+
+    def test_recorded_images(self):
+        register()
+        source = self.write_post('pie', [])
+        doctree = publish_doctree(':itemprop:`Pie <photo|pie.jpg|img>` :itemprop:`Pie <name>`')
+        doctree['source'] = source
+        self.store(doctree, [])
+        self.assertEqual(self.store.load(self.store.path(source))['images'], ['pie.jpg'])
+
+    def test_item_words(self):
+        words = item_words(recipe('Apple Pie', 'apples', 'a sugar'))
+        self.assertEqual(words, ['apple', 'apples', 'grandma', 'pie', 'sugar'])
+
+    def test_search_index(self):
+        self.write_post('pie', [recipe('Apple Pie', 'apples', 'sugar')])
+        self.write_post('cake', [recipe('Cake', 'flour', 'sugar')])
+        index = SearchIndex(os.path.join(self.folder, 'output', 'search.json'), self.folder)
+        self.assertEqual(index.update(self.store, self.urls), (2, 0))
+        data = json.loads(self.read(index))
+        self.assertEqual(sorted(data['documents']), [
+            ['http://example.com/posts/cake/', 'Cake', 'Recipe'],
+            ['http://example.com/posts/pie/', 'Apple Pie', 'Recipe'],
+        ])
+        self.assertEqual(len(data['index']['sugar']), 2)
+        [pie] = data['index']['apples']
+        self.assertEqual(data['documents'][pie][1], 'Apple Pie')
+
+    def test_itemtypes(self):
+        self.write_post('pie', [recipe('Apple Pie', 'apples')])
+        index = SearchIndex(os.path.join(self.folder, 'output', 'search.json'), self.folder, [PERSON])
+        index.update(self.store, self.urls)
+        data = json.loads(self.read(index))
+        self.assertEqual(data['documents'], [['http://example.com/posts/pie/', 'Grandma', 'Person']])
+        self.assertNotIn('apples', data['index'])
+
+    def test_incremental(self):
+        self.write_post('pie', [recipe('Apple Pie', 'apples')])
+        cake = self.write_post('cake', [recipe('Cake', 'flour')])
+        index = SearchIndex(os.path.join(self.folder, 'output', 'search.json'), self.folder)
+        index.update(self.store, self.urls)
+        self.assertEqual(index.update(self.store, self.urls), (0, 0))
+        time.sleep(0.01)
+        self.store.write(cake, {'items': [recipe('Cake', 'eggs')], 'images': []})
+        self.assertEqual(index.update(self.store, self.urls), (1, 0))
+        data = json.loads(self.read(index))
+        self.assertIn('eggs', data['index'])
+        self.assertNotIn('flour', data['index'])
+
+
+if __name__ == "__main__":
+    unittest.main()
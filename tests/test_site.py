@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+
+from microdata.microdata import rest_module
+from .test_base import BaseTestCase
+
+CONF = """
+BLOG_TITLE = "Microdata"
+SITE_URL = "https://example.com/"
+BLOG_EMAIL = "joe@example.com"
+BLOG_DESCRIPTION = "Microdata"
+BLOG_AUTHOR = "Joe"
+DEFAULT_LANG = "en"
+POSTS = (("posts/*.rst", "posts", "post.tmpl"),)
+PAGES = ()
+COMPILERS = {"rest": (".rst",)}
+"""
+
+POST = """.. title: Apple Pie
+.. slug: apple-pie
+.. date: 2014-01-01 00:00:00 UTC
+
+.. itemscope:: Recipe
+
+    :itemprop:`Apple Pie <name>` is ready in :itemprop:`30 min <prepTime>`.
+"""
+
+PLUGIN_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'microdata')
+
+
+class SiteTestCase(BaseTestCase):
+    """The plugin installed in the ``plugins`` folder of a site, as Nikola does."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        shutil.copytree(PLUGIN_FOLDER, os.path.join(self.folder, 'plugins', 'microdata'),
+                        ignore=shutil.ignore_patterns('*.pyc', '__pycache__'))
+        os.makedirs(os.path.join(self.folder, 'posts'))
+        with io.open(os.path.join(self.folder, 'conf.py'), 'w', encoding='utf8') as f:
+            f.write(CONF)
+        with io.open(os.path.join(self.folder, 'posts', 'apple-pie.rst'), 'w', encoding='utf8') as f:
+            f.write(POST)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def run_site(self, code):
+        """Run ``code`` in the site folder, without this checkout in the path."""
+        env = dict(os.environ)
+        env.pop('PYTHONPATH', None)
+        process = subprocess.Popen([sys.executable, '-c', code], cwd=self.folder, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0].decode('utf8')
+        self.assertEqual(process.returncode, 0, output)
+        return output
+
+    def test_load(self):
+        output = self.run_site(
+            'import conf\n'
+            'from nikola.nikola import Nikola\n'
+            'site = Nikola(**conf.__dict__)\n'
+            'site.init_plugins()\n'
+            'print([plugin.name for plugin in site.compiler_extensions])\n')
+        self.assertIn("'rest_microdata'", output)
+
+    def test_build(self):
+        with io.open(os.path.join(self.folder, 'conf.py'), 'a', encoding='utf8') as f:
+            f.write('MICRODATA_INDEX = True\n')
+        self.run_site('import sys\nfrom nikola.__main__ import main\nsys.exit(main(["build"]))\n')
+        with io.open(os.path.join(self.folder, 'output', 'posts', 'apple-pie', 'index.html'), encoding='utf8') as f:
+            page = f.read()
+        self.assertIn('<div itemscope="itemscope" itemtype="http://data-vocabulary.org/Recipe">', page)
+        self.assertIn('<span itemprop="name">Apple Pie</span>', page)
+        records = os.listdir(os.path.join(self.folder, 'cache', 'microdata', 'items'))
+        self.assertEqual(len(records), 1)
+
+
+class PluginManager(object):
+    """The yapsy plugin manager of Nikola < 8.3."""
+
+    def __init__(self, plugin_object=None):
+        self.plugin_object = plugin_object
+
+    def getPluginByName(self, name, category):
+        if self.plugin_object is None:
+            return None
+        return PluginInfo(self.plugin_object)
+
+
+class PluginInfo(object):
+
+    def __init__(self, plugin_object):
+        self.plugin_object = plugin_object
+
+
+class FakeSite(object):
+
+    def __init__(self, plugin_object=None):
+        self.plugin_manager = PluginManager(plugin_object)
+
+
+class RestModuleTestCase(BaseTestCase):
+
+    def test_loaded_module(self):
+        # yapsy loads the compiler plugin as a module of its own
+        module = types.ModuleType(str('yapsy_loaded_plugin_rest_0'))
+        module.rst2html = lambda source: source
+        compiler_class = type(str('CompileRest'), (object,), {'__module__': module.__name__})
+        sys.modules[module.__name__] = module
+        try:
+            self.assertIs(rest_module(FakeSite(compiler_class())), module)
+        finally:
+            del sys.modules[module.__name__]
+
+    def test_fallback(self):
+        from nikola.plugins.compile import rest
+        self.assertIs(rest_module(FakeSite()), rest)
+
+
+if __name__ == "__main__":
+    unittest.main()
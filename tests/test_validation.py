@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from docutils.core import publish_doctree
+
+from microdata import validation
+from microdata.rst import register
+from .test_base import BaseTestCase
+
+SETTINGS = {'report_level': 5}
+
+
+class ValidateTestCase(BaseTestCase):
+
+    def setUp(self):
+        register()
+
+    def tearDown(self):
+        validation.enabled = False
+
+    def validate(self, text):
+        doctree = publish_doctree(text, settings_overrides=SETTINGS)
+        return [(p['line'], p['message']) for p in validation.validate(doctree)]
+
+    def test_valid(self):
+        self.assertEqual(self.validate(""".. itemscope:: Recipe
+
+            .. itempropblock:: name
+                :tag: h1
+
+                Apple Pie
+
+            By :itemprop:`Grandma <author>`
+
+            .. itemscope:: RecipeIngredient
+                :tag: span
+                :itemprop: ingredient
+
+                :itemprop:`apples <name>`
+        """), [])
+
+    def test_problems(self):
+        self.assertEqual(self.validate(""":itemprop:`Bob <name>`
+
+.. itemscope:: Recipe
+
+    :itemprop:`Bob <nickname>`
+
+    .. itemscope:: Person
+
+        :itemprop:`Bob <name>`
+
+.. itemscope:: Unknown
+
+    :itemprop:`Bob <anything>`
+"""), [
+            (1, 'itemprop "name" outside of an itemscope'),
+            (5, 'unknown property "nickname" for itemtype "Recipe"'),
+            (7, 'nested itemscope http://data-vocabulary.org/Person without itemprop'),
+            (11, 'unknown itemtype http://data-vocabulary.org/Unknown'),
+        ])
+
+    def test_invalid_role(self):
+        self.assertRaises(ValueError, publish_doctree, ':itemprop:`no name`', settings_overrides=SETTINGS)
+        validation.enabled = True
+        self.assertEqual(self.validate(':itemprop:`no name`'), [
+            (1, 'no name does not match expected itemprop format: :itemprop:`value <name>`'),
+        ])
+
+
+class CollectTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_collect(self):
+        validator = validation.Validator(os.path.join(self.folder, 'problems'))
+        sources = []
+        for name in ('b', 'a'):
+            source = os.path.join(self.folder, name + '.rst')
+            with io.open(source, 'w', encoding='utf8') as f:
+                f.write(name)
+            sources.append(source)
+            validator.store.write(source, {'problems': [{'line': 2, 'message': 'bad'}]})
+        self.assertEqual(validation.collect(validator.store.folder), [
+            (sources[1], 2, 'bad'),
+            (sources[0], 2, 'bad'),
+        ])
+        os.remove(sources[0])
+        self.assertEqual(len(validation.collect(validator.store.folder)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, absolute_import
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from microdata import vocabulary
+from microdata.core import Prop, prop_element
+from .test_base import BaseTestCase
+
+DEFINITIONS = {
+    'url': 'https://schema.org/',
+    'types': {
+        'Thing': {'properties': ['name', 'url']},
+        'CreativeWork': {'parent': 'Thing', 'properties': ['author']},
+        'Recipe': {'parent': 'CreativeWork', 'properties': ['prepTime']},
+    },
+    'tags': {'url': 'a', 'prepTime': 'time'},
+}
+
+
+class VocabularyTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'schema.json')
+        with io.open(self.path, 'w', encoding='utf8') as f:
+            f.write(json.dumps(DEFINITIONS))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        vocabulary.configure()
+
+    def test_compile(self):
+        vocab = vocabulary.Vocabulary.compile(DEFINITIONS)
+        self.assertEqual(vocab.properties('Recipe'), frozenset(['name', 'url', 'author', 'prepTime']))
+        self.assertEqual(vocab.properties('Unknown'), frozenset())
+        self.assertIn('Thing', vocab)
+        self.assertEqual(vocab.itemtype('Recipe'), 'https://schema.org/Recipe')
+        self.assertIs(vocab.itemtype('Unknown'), vocab.itemtype('Unknown'))
+        self.assertEqual(vocab.tag('prepTime'), 'time')
+        self.assertIsNone(vocab.tag('name'))
+
+    def test_prefixes(self):
+        vocab = vocabulary.Vocabulary.compile(DEFINITIONS).configured(
+            'http://data-vocabulary.org/', {'org': 'https://example.org/vocab/'})
+        self.assertEqual(vocab.itemtype('Recipe'), 'http://data-vocabulary.org/Recipe')
+        self.assertEqual(vocab.name('http://data-vocabulary.org/Recipe'), 'Recipe')
+        self.assertEqual(vocab.itemtype('org:Product'), 'https://example.org/vocab/Product')
+        self.assertEqual(vocab.itemtype('https://schema.org/Offer'), 'https://schema.org/Offer')
+        self.assertIs(vocab.itemtype('org:Product'), vocab.itemtype('https://example.org/vocab/Product'))
+        self.assertIs(vocab.itemtype('Recipe'), vocab.itemtype('http://data-vocabulary.org/Recipe'))
+
+    def test_urls_by_name(self):
+        vocab = vocabulary.Vocabulary.compile(DEFINITIONS).configured(
+            'http://data-vocabulary.org/', {'org': 'https://example.org/vocab/'})
+        vocab.itemtype('org:Product')
+        vocab.itemtype('Unknown')
+        # The URLs are interned apart, only the given names are keys
+        self.assertNotIn('https://example.org/vocab/Product', vocab.urls)
+        self.assertNotIn('http://data-vocabulary.org/Unknown', vocab.urls)
+
+    def test_configure_url(self):
+        vocabulary.configure(self.path, url='http://schema.org/', prefixes={'org': 'https://example.org/'})
+        fingerprint = vocabulary.fingerprint()
+        self.assertEqual(vocabulary.get_vocabulary().itemtype('Recipe'), 'http://schema.org/Recipe')
+        self.assertEqual(vocabulary.get_vocabulary().properties('Recipe'),
+                         frozenset(['name', 'url', 'author', 'prepTime']))
+        vocabulary.configure(self.path)
+        self.assertNotEqual(vocabulary.fingerprint(), fingerprint)
+
+    def test_pickled(self):
+        cache = os.path.join(self.folder, 'cache')
+        first = vocabulary.load(self.path, cache)
+        self.assertEqual(len(os.listdir(cache)), 1)
+        second = vocabulary.load(self.path, cache)
+        self.assertEqual(second.types, first.types)
+        self.assertIsNot(second, first)
+
+    def test_lazy(self):
+        vocabulary.configure(self.path)
+        self.assertIsNone(vocabulary._vocabulary)
+        self.assertEqual(vocabulary.get_vocabulary().url, 'https://schema.org/')
+
+    def test_prop_element(self):
+        vocabulary.configure(self.path)
+        self.assertEqual(prop_element(Prop('30 min', 'prepTime', 'PT30M', '')),
+                         ('time', {'itemprop': 'prepTime', 'datetime': 'PT30M'}, False))
+        self.assertEqual(prop_element(Prop('soon', 'prepTime', '', '')),
+                         ('span', {'itemprop': 'prepTime'}, False))
+        self.assertEqual(prop_element(Prop('soon', 'prepTime', '', 'time')),
+                         ('time', {'itemprop': 'prepTime'}, False))
+        self.assertEqual(prop_element(Prop('Test', 'url', 'http://somewhere/', '')),
+                         ('a', {'itemprop': 'url', 'href': 'http://somewhere/'}, False))
+        self.assertEqual(prop_element(Prop('', 'photo', 'pie.jpg', 'img')),
+                         ('img', {'itemprop': 'photo', 'src': 'pie.jpg'}, True))
+        self.assertEqual(prop_element(Prop('Bob', 'name', '', '')),
+                         ('span', {'itemprop': 'name'}, False))
+
+
+if __name__ == "__main__":
+    unittest.main()